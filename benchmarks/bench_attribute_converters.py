@@ -0,0 +1,44 @@
+""" Micro-benchmark of species attribute conversion: string_to_value versus the compiled
+per-tag converters used by the species parsers.
+
+<wf> attributes are converted by calling the converters of species_schema['wf'] directly,
+without building a dict per radial function, which is also timed.
+
+With the package installed, run:  python benchmarks/bench_attribute_converters.py
+"""
+import timeit
+
+from exgw.src.parse.parsers import species_converters, species_schema
+from exgw.src.utils.utils import string_to_value
+
+# Attributes as returned by the XML parser, for each tag of a species file
+attributes = {
+    'sp': {'chemicalSymbol': 'Zn', 'name': 'zinc', 'z': '-30.0000', 'mass': '119198.6780'},
+    'atomicState': {'n': '3', 'l': '2', 'kappa': '3', 'occ': '6.00000', 'core': 'false'},
+    'custom': {'l': '0', 'type': 'lapw', 'trialEnergy': '1.35670550183736', 'searchE': 'false'},
+    'wf': {'matchingOrder': '1', 'trialEnergy': '-4.37848525995355', 'searchE': 'false'}
+}
+
+
+def main(number: int = 100000):
+    print(f'{"tag":<12} {"string_to_value (s)":>20} {"compiled (s)":>14} {"speed-up":>10}')
+    for tag, attrib in attributes.items():
+        convert = species_converters[tag]
+        t_json = timeit.timeit(lambda: string_to_value(attrib), number=number)
+        t_compiled = timeit.timeit(lambda: convert(attrib), number=number)
+        print(f'{tag:<12} {t_json:>20.3f} {t_compiled:>14.3f} {t_json / t_compiled:>10.1f}')
+
+    attrib = attributes['wf']
+    wf_schema = species_schema['wf']
+    convert_order, convert_energy, convert_search = \
+        wf_schema['matchingOrder'], wf_schema['trialEnergy'], wf_schema['searchE']
+    t_compiled = timeit.timeit(lambda: species_converters['wf'](attrib), number=number)
+    t_direct = timeit.timeit(lambda: (convert_order(attrib['matchingOrder']),
+                                      convert_energy(attrib['trialEnergy']),
+                                      convert_search(attrib['searchE'])), number=number)
+    print(f'\n{"wf":<12} {"compiled (s)":>20} {"direct (s)":>14} {"speed-up":>10}')
+    print(f'{"":<12} {t_compiled:>20.3f} {t_direct:>14.3f} {t_compiled / t_direct:>10.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+""" Benchmark of parsing lorecommendations.dat: the original line-by-line loop versus
+lorecommendations_array_from_string.
+
+Synthetic files have n_species species, with l = 0 to 7 and n = 0 to 50 per l-channel,
+and energies written to 15 significant figures, as by exciting. Timings are the best of 5 repeats.
+
+With the package installed, run:  python benchmarks/bench_lorecommendations.py
+"""
+import timeit
+
+import numpy as np
+
+from exgw.src.parse.parsers import lorecommendations_array_from_string
+
+
+def synthetic_lorecommendations(n_species: int, l_max: int = 7, node_max: int = 50) -> str:
+    """ lorecommendations.dat contents, with random energies.
+    """
+    rng = np.random.default_rng(0)
+    lines = ['Energy parameters', ' ------------']
+    for i_species in range(0, n_species):
+        lines.append(f' species {i_species + 1:11d}')
+        for l in range(0, l_max + 1):
+            lines.append(f' l= {l:11d}')
+            for n in range(0, node_max + 1):
+                lines.append(f' n= {n:11d}  {100 * rng.normal():.15g}     ')
+            lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def loop_lorecommendations(string: str, n_species: int, l_max: int = 7, node_max: int = 50) -> np.ndarray:
+    """ Line-by-line parsing, as in the original parse_lorecommendations.
+    """
+    lines = string.splitlines()[3:]
+    energies = np.empty(shape=(n_species, l_max + 1, node_max + 1))
+    i = 0
+    for i_species in range(0, n_species):
+        for i_l in range(0, l_max + 1):
+            i += 1
+            for i_n in range(0, node_max + 1):
+                energies[i_species, i_l, i_n] = float(lines[i].split()[2])
+                i += 1
+            i += 1
+        i += 1
+    return energies
+
+
+def main(number: int = 10):
+    print(f'{"n_species":>10} {"loop (ms)":>12} {"array (ms)":>12} {"speed-up":>10}')
+    for n_species in [2, 20, 200]:
+        string = synthetic_lorecommendations(n_species)
+        assert np.array_equal(lorecommendations_array_from_string(string), loop_lorecommendations(string, n_species))
+
+        t_loop = min(timeit.repeat(lambda: loop_lorecommendations(string, n_species),
+                                   number=number, repeat=5)) / number
+        t_array = min(timeit.repeat(lambda: lorecommendations_array_from_string(string),
+                                    number=number, repeat=5)) / number
+        print(f'{n_species:>10} {1.e3 * t_loop:>12.3f} {1.e3 * t_array:>12.3f} {t_loop / t_array:>10.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+""" Benchmark of the node analysis of a species: compute_max_nodes_per_orbital_channel,
+which loops over dictionaries, versus the vectorised compute_max_nodes_per_channel,
+which operates on the structured arrays of CompactSpecies, and versus a cache hit of
+max_nodes_per_orbital_channel, which only builds the species fingerprint.
+
+Synthetic species have valence states in l = 0-2, and n_los LOs spread over
+l = 0 to l_max, with conduction LOs at increasing energies.
+
+The vectorised analysis has a fixed overhead of a few tens of microseconds from NumPy
+calls, so only pays off for species with more than ~100 LOs. Default species files have
+far fewer, hence max_nodes_per_orbital_channel retains the dictionary implementation.
+A cache hit must be cheaper than either, else caching slows down every call of
+construct_optimised_basis in a sweep. Building the fingerprint still scales with the
+number of LOs, so for very large species the hit approaches the cost of the analysis;
+pass a precomputed max_nodes to construct_optimised_basis to skip both.
+
+With the package installed, run:  python benchmarks/bench_node_counting.py
+"""
+import timeit
+
+from exgw.src.basis.compact_basis import CompactSpecies
+from exgw.src.basis.optimised_basis import compute_max_nodes_per_orbital_channel, compute_max_nodes_per_channel, \
+    max_nodes_per_orbital_channel
+
+
+def synthetic_species(n_los: int, l_max: int = 7) -> dict:
+    """ Species with n_los LOs over l-channels 0 to l_max.
+    """
+    atomic_states = [{'n': n, 'l': l, 'kappa': 1, 'occ': 2.0, 'core': n < 3}
+                     for l in range(0, 3) for n in range(l + 1, l + 4)]
+
+    los = []
+    for i in range(0, n_los):
+        l = i % (l_max + 1)
+        # Valence LOs for the lowest LO of channels with valence states
+        energy = -1.0 if (l < 3 and i <= l_max) else 0.5 * (i // (l_max + 1))
+        los.append({'l': l, 'matchingOrder': [0, 1], 'trialEnergy': [energy, energy], 'searchE': [False, False]})
+
+    return {'species': {}, 'muffin_tin': {}, 'atomic_states': atomic_states,
+            'basis': {'default': [], 'custom': [], 'lo': los}}
+
+
+def main(number: int = 2000):
+    print(f'{"n_los":>8} {"dict (ms)":>12} {"vectorised (ms)":>16} {"speed-up":>10} '
+          f'{"cache hit (ms)":>16} {"speed-up":>10}')
+    for n_los in [10, 50, 100, 200, 500, 1000]:
+        species = synthetic_species(n_los)
+        compact = CompactSpecies.from_dict(species)
+        assert compute_max_nodes_per_channel(compact) == compute_max_nodes_per_orbital_channel(species)
+        assert max_nodes_per_orbital_channel(species) == compute_max_nodes_per_orbital_channel(species)
+
+        t_dict = timeit.timeit(lambda: compute_max_nodes_per_orbital_channel(species), number=number) / number
+        t_vectorised = timeit.timeit(lambda: compute_max_nodes_per_channel(compact), number=number) / number
+        t_cached = timeit.timeit(lambda: max_nodes_per_orbital_channel(species), number=number) / number
+        print(f'{n_los:>8} {1.e3 * t_dict:>12.4f} {1.e3 * t_vectorised:>16.4f} {t_dict / t_vectorised:>10.1f} '
+              f'{1.e3 * t_cached:>16.4f} {t_dict / t_cached:>10.1f}')
+
+
+if __name__ == "__main__":
+    main()
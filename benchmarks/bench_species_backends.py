@@ -0,0 +1,68 @@
+""" Benchmark of the species parser backends: 'etree', which builds an ElementTree and walks it,
+versus 'expat', which converts attributes in a single streaming pass.
+
+A synthetic library of species files is written to a temporary directory, with n_los LOs
+per species (two radial functions each), and parsed in serial with parse_species_files.
+Default species files have ~15 LOs, optimised bases ~100 or more.
+
+Both backends share the attribute converters, and the C parser behind ElementTree builds
+the tree about as fast as expat calls back into Python, so the streaming backend only saves
+the walk over the tree. Expect a modest gain, which grows with the number of LOs.
+
+With the package installed, run:  python benchmarks/bench_species_backends.py
+"""
+import os
+import tempfile
+import timeit
+
+from exgw.src.parse.parsers import parse_species_files
+
+header = """<?xml version="1.0" encoding="utf-8"?>
+<spdb>
+  <sp chemicalSymbol="{symbol}" name="species {i}" z="-30.0000" mass="119198.6780">
+    <muffinTin rmin="0.100000E-05" radius="2.0000" rinf="21.8982" radialmeshPoints="600"/>
+"""
+
+atomic_state = '    <atomicState n="{n}" l="{l}" kappa="1" occ="2.00000" core="{core}"/>\n'
+
+lo = """      <lo l="{l}">
+        <wf matchingOrder="0" trialEnergy="{energy}" searchE="false"/>
+        <wf matchingOrder="1" trialEnergy="{energy}" searchE="false"/>
+      </lo>
+"""
+
+
+def synthetic_species(i: int, n_los: int, l_max: int = 7) -> str:
+    """ Species file with n_los LOs over l-channels 0 to l_max.
+    """
+    lines = [header.format(symbol=f'X{i}', i=i)]
+    lines += [atomic_state.format(n=n, l=l, core=str(n < 3).lower()) for l in range(0, 3) for n in range(l + 1, l + 4)]
+    lines.append('    <basis>\n      <default type="lapw" trialEnergy="0.1500" searchE="true"/>\n')
+    lines += [f'      <custom l="{l}" type="lapw" trialEnergy="1.0" searchE="false"/>\n' for l in range(0, l_max + 1)]
+    lines += [lo.format(l=j % (l_max + 1), energy=f'{0.5 * j - 4.0:.14f}') for j in range(0, n_los)]
+    lines.append('    </basis>\n  </sp>\n</spdb>\n')
+    return ''.join(lines)
+
+
+def main(n_species: int = 100, number: int = 5):
+    print(f'{"n_los":>8} {"etree (ms)":>12} {"expat (ms)":>12} {"speed-up":>10}')
+    for n_los in [15, 100, 500]:
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(0, n_species):
+                with open(os.path.join(directory, f'X{i}.xml'), 'w') as fid:
+                    fid.write(synthetic_species(i, n_los))
+
+            etree, _ = parse_species_files(directory, n_workers=1, backend='etree')
+            expat, _ = parse_species_files(directory, n_workers=1, backend='expat')
+            assert etree == expat
+
+            times = {}
+            for backend in ['etree', 'expat']:
+                times[backend] = min(timeit.repeat(lambda: parse_species_files(directory, n_workers=1, backend=backend),
+                                                   number=number, repeat=5)) / number
+        print(f'{n_los:>8} {1.e3 * times["etree"]:>12.2f} {1.e3 * times["expat"]:>12.2f} '
+              f'{times["etree"] / times["expat"]:>10.2f}')
+
+
+if __name__ == "__main__":
+    main()
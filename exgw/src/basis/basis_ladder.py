@@ -0,0 +1,109 @@
+""" Basis ladder for monotone LO sweeps.
+
+For fixed l_max, an optimised basis with a higher LO cutoff is a strict superset of
+one with a lower cutoff: the same default LOs, with more high-energy LOs appended per
+l-channel. A ladder stores every candidate LO per l-channel once, and represents each
+sweep point (rung) as the number of candidate LOs used per l-channel.
+
+Materialising, comparing or counting any rung is then a slice, rather than a rebuild:
+
+    ladder = BasisLadder(default_basis, lo_recommendations, l_max=4,
+                         lo_cutoffs=[{l: cutoff for l in range(0, 5)} for cutoff in [20, 30, 40]])
+    basis = ladder.basis(2)
+    added_los = ladder.diff(0, 2)
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from exgw.src.basis.optimised_basis import _lo_windows, initialise_optimised_basis, serialised_local_orbitals
+
+
+class BasisLadder:
+    """ Optimised bases of a sweep over LO cutoffs (or numbers of LOs), at fixed l_max.
+
+    rung i is equivalent to:
+      construct_optimised_basis(default_basis, lo_recommendations, l_max, lo_cutoffs[i])
+    or
+      construct_optimised_basis(default_basis, lo_recommendations, l_max, n_los=n_los[i])
+
+    LO dictionaries are shared between rungs, hence must be treated as read-only.
+    """
+    def __init__(self, default_basis: dict,
+                 lo_recommendations: np.ndarray,
+                 l_max: int,
+                 lo_cutoffs: Optional[List[dict]] = None,
+                 n_los: Optional[List[dict]] = None):
+        """
+        :param default_basis: Default basis in serialised form.
+        :param lo_recommendations: LO energy recommendations, with shape = (l_max+1, n_nodes+1)
+        :param l_max: Maximum l-channel of all bases.
+        :param lo_cutoffs: LO energy cutoff per l-channel, of each rung.
+        :param n_los: Number of LOs per l-channel, of each rung.
+        """
+        recommendations_l_max = lo_recommendations.shape[0] - 1
+        if l_max > recommendations_l_max:
+            raise ValueError(f'LO recommendations go up to l={recommendations_l_max}, however'
+                             f'l_max requested is {l_max}')
+
+        first_indices, last_indices = _lo_windows(default_basis, lo_recommendations, lo_cutoffs, n_los)
+        last_indices = np.atleast_2d(last_indices)
+
+        self.l_max = l_max
+        self.default_basis = default_basis
+
+        # Default LOs per l-channel
+        self.default_los: List[List[dict]] = [[] for _ in range(0, l_max + 1)]
+        for lo in default_basis['basis']['lo']:
+            if lo['l'] <= l_max:
+                self.default_los[lo['l']].append(lo)
+
+        # All candidate LOs per l-channel, from the first recommendation not already in the basis
+        self.candidate_los: List[List[dict]] = [
+            serialised_local_orbitals(l, lo_recommendations[l, first_indices[l]:]) for l in range(0, l_max + 1)]
+
+        # Number of candidate LOs used per rung and l-channel. Each recommendation gives two LOs
+        n_recommendations = np.maximum(last_indices[:, :l_max + 1] - first_indices[:l_max + 1], 0)
+        self.ends: np.ndarray = 2 * n_recommendations
+
+    def __len__(self) -> int:
+        return self.ends.shape[0]
+
+    def channel_los(self, rung: int, l: int) -> List[dict]:
+        """ LOs of l-channel l, of a rung.
+        """
+        return self.default_los[l] + self.candidate_los[l][:self.ends[rung, l]]
+
+    def los(self, rung: int) -> List[dict]:
+        """ All LOs of a rung, ordered by l-channel.
+        """
+        return [lo for l in range(0, self.l_max + 1) for lo in self.channel_los(rung, l)]
+
+    def basis(self, rung: int) -> dict:
+        """ Materialise the optimised basis of a rung.
+        """
+        optimised_basis = initialise_optimised_basis(self.default_basis, self.l_max)
+        optimised_basis['basis']['lo'] = self.los(rung)
+        return optimised_basis
+
+    def n_los(self, rung: Optional[int] = None) -> np.ndarray:
+        """ Number of LOs per l-channel.
+
+        :param rung: Optional rung. If omitted, return the LOs of all rungs.
+        :return: Number of LOs with shape (l_max + 1), or (n_rungs, l_max + 1) for all rungs.
+        """
+        n_default = np.array([len(los) for los in self.default_los], dtype=int)
+        ends = self.ends if rung is None else self.ends[rung]
+        return n_default + ends
+
+    def diff(self, lower: int, upper: int) -> Dict[int, List[dict]]:
+        """ LOs added per l-channel, going from rung lower to rung upper.
+
+        :param lower: Rung with the smaller basis.
+        :param upper: Rung with the larger basis.
+        :return: Added LOs per l-channel.
+        """
+        if (self.ends[upper] < self.ends[lower]).any():
+            raise ValueError(f'Basis of rung {upper} is not a superset of the basis of rung {lower}')
+
+        return {l: self.candidate_los[l][self.ends[lower, l]:self.ends[upper, l]] for l in range(0, self.l_max + 1)}
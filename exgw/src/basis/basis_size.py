@@ -0,0 +1,105 @@
+""" Estimate the size and relative cost of (L)APW+LO bases.
+
+The dimension of the (L)APW+LO basis (and hence the Hamiltonian) is:
+
+  N = N_PW + sum_{atoms} sum_{LOs} (2l + 1)
+
+where N_PW is the number of plane waves |G+k| < G_max, and each LO in l-channel l
+contributes (2l + 1) basis functions per atom. Only the LO contribution depends on
+the species files, so sweeps at fixed rgkmax can be ranked by it alone.
+
+Costs are estimated relative to a reference basis, assuming power-law scaling in N,
+with the exponents given in cost_exponents.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from exgw.src.basis.optimised_basis import los_per_channel
+
+# Scaling of each cost with the basis dimension, N^exponent
+# The Hamiltonian and overlap are dense N x N matrices, and are diagonalised with O(N^3) operations.
+# The GW step inherits this scaling through the number of basis functions per state.
+cost_exponents = {'hamiltonian_memory': 2,
+                  'diagonalisation_time': 3,
+                  'gw_memory': 2,
+                  'gw_time': 3}
+
+
+def n_plane_waves(volume: float, rgkmax: float, rmt_min: float) -> int:
+    """ Estimate the number of plane waves with |G+k| < G_max, where G_max = rgkmax / rmt_min.
+
+    The number of reciprocal lattice points within a sphere of radius G_max is
+    V G_max^3 / (6 pi^2).
+
+    :param volume: Unit cell volume (bohr^3).
+    :param rgkmax: Product of the smallest muffin tin radius and G_max.
+    :param rmt_min: Smallest muffin tin radius (bohr).
+    :return: Estimated number of plane waves.
+    """
+    g_max = rgkmax / rmt_min
+    return int(round(volume * g_max ** 3 / (6 * np.pi ** 2)))
+
+
+def lo_functions_per_atom(basis: dict, l_max: Optional[int] = None) -> int:
+    """ Number of LO basis functions contributed by one atom of a species.
+
+    :param basis: Species basis, for example as returned by construct_optimised_basis.
+    :param l_max: Optional maximum l-channel. Defaults to the largest l of the LOs, or 0 if there are none.
+    :return: sum_{LOs} (2l + 1)
+    """
+    if l_max is None:
+        l_max = max((lo['l'] for lo in basis['basis']['lo']), default=0)
+    n_los = los_per_channel(basis['basis']['lo'], l_max)
+    return int(np.dot(n_los, 2 * np.arange(0, l_max + 1) + 1))
+
+
+def estimate_basis_size(bases: Dict[str, dict], n_atoms: Dict[str, int], n_pw: int = 0) -> dict:
+    """ Estimate the size of the (L)APW+LO basis of a structure.
+
+    Return a dictionary with elements:
+    n_los = {'ti': [n_los(l=0), n_los(l=1), ...], 'o': [...]}, the LOs per l-channel of each species.
+    n_lo_functions = sum_{species} n_atoms * sum_{LOs} (2l + 1)
+    n_pw = Number of plane waves.
+    dimension = n_pw + n_lo_functions
+    hamiltonian_elements = dimension^2
+
+    :param bases: Basis per species, for example {'ti': basis_ti, 'o': basis_o}.
+    :param n_atoms: Number of atoms per species, in the unit cell.
+    :param n_pw: Optional number of plane waves. See n_plane_waves.
+    If omitted, only the LO contribution to the dimension is included, which suffices to rank
+    bases at fixed rgkmax, but not to estimate their relative cost. See relative_cost.
+    :return: Basis size estimates (described above).
+    """
+    n_los = {}
+    n_lo_functions = 0
+    for x, basis in bases.items():
+        l_max = max((lo['l'] for lo in basis['basis']['lo']), default=0)
+        n_los[x] = los_per_channel(basis['basis']['lo'], l_max).tolist()
+        n_lo_functions += n_atoms[x] * lo_functions_per_atom(basis, l_max)
+
+    dimension = n_pw + n_lo_functions
+
+    return {'n_los': n_los,
+            'n_lo_functions': n_lo_functions,
+            'n_pw': n_pw,
+            'dimension': dimension,
+            'hamiltonian_elements': dimension ** 2}
+
+
+def relative_cost(size: dict, reference: dict, exponents: Optional[dict] = None) -> dict:
+    """ Estimate the cost of a basis relative to a reference basis, for example the default basis.
+
+    Each cost is (dimension / reference dimension)^exponent.
+
+    :param size: Basis size, as returned by estimate_basis_size.
+    :param reference: Reference basis size, as returned by estimate_basis_size.
+    :param exponents: Optional scaling exponents per cost. Defaults to cost_exponents.
+    :return: Relative cost per key of exponents.
+    """
+    if size['n_pw'] == 0 or reference['n_pw'] == 0:
+        raise ValueError('Relative costs require the number of plane waves, '
+                         'however estimate_basis_size was called without n_pw')
+    exponents = cost_exponents if exponents is None else exponents
+    ratio = size['dimension'] / reference['dimension']
+    return {key: ratio ** exponent for key, exponent in exponents.items()}
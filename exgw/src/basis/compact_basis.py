@@ -0,0 +1,153 @@
+""" Compact, typed representation of species data.
+
+parse_species_xml returns the basis as nested dictionaries of lists. Here, atomic
+states and local orbitals are stored as NumPy structured arrays, which are smaller
+and can be filtered without Python loops:
+
+ * Atomic states: One row per state, with columns (n, l, kappa, occ, core).
+ * Local orbitals: One row per radial function (wf), with columns (lo, l, matchingOrder,
+   trialEnergy, searchE), where lo is the index of the LO the radial function belongs to.
+
+Conversion to and from the dictionary form is lossless.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+atomic_state_dtype = np.dtype([('n', np.int32), ('l', np.int32), ('kappa', np.int32),
+                               ('occ', np.float64), ('core', np.bool_)])
+
+lo_dtype = np.dtype([('lo', np.int32), ('l', np.int32), ('matchingOrder', np.int32),
+                     ('trialEnergy', np.float64), ('searchE', np.bool_)])
+
+
+def atomic_states_to_array(atomic_states: List[dict]) -> np.ndarray:
+    """ Convert atomic states from dictionary to structured array form.
+
+    :param atomic_states: Atomic states, as returned by parse_species_xml.
+    :return: Structured array with dtype atomic_state_dtype.
+    """
+    rows = [(s['n'], s['l'], s['kappa'], s['occ'], s['core']) for s in atomic_states]
+    return np.array(rows, dtype=atomic_state_dtype)
+
+
+def array_to_atomic_states(table: np.ndarray) -> List[dict]:
+    """ Convert atomic states from structured array to dictionary form.
+
+    :param table: Structured array with dtype atomic_state_dtype.
+    :return: Atomic states, as returned by parse_species_xml.
+    """
+    return [{'n': n, 'l': l, 'kappa': kappa, 'occ': occ, 'core': core}
+            for n, l, kappa, occ, core in table.tolist()]
+
+
+def los_to_array(los: List[dict]) -> np.ndarray:
+    """ Convert local orbitals from dictionary to structured array form.
+
+    Given:
+    los = [{'l': 2, 'matchingOrder': [0, 1], 'trialEnergy': [0.0, 0.0], 'searchE': [False, False]}, ...]
+
+    return rows:
+    (lo=0, l=2, matchingOrder=0, trialEnergy=0.0, searchE=False)
+    (lo=0, l=2, matchingOrder=1, trialEnergy=0.0, searchE=False)
+    ...
+
+    :param los: Local orbitals, as returned by parse_species_xml.
+    :return: Structured array with dtype lo_dtype, with one row per radial function.
+    """
+    rows = [(i, lo['l'], matching_order, trial_energy, search_e)
+            for i, lo in enumerate(los)
+            for matching_order, trial_energy, search_e in zip(lo['matchingOrder'], lo['trialEnergy'], lo['searchE'])]
+    return np.array(rows, dtype=lo_dtype)
+
+
+def array_to_los(table: np.ndarray) -> List[dict]:
+    """ Convert local orbitals from structured array to dictionary form.
+
+    :param table: Structured array with dtype lo_dtype, with one row per radial function.
+    Rows of the same LO must be contiguous.
+    :return: Local orbitals, as returned by parse_species_xml.
+    """
+    los = []
+    previous = None
+    for i, l, matching_order, trial_energy, search_e in table.tolist():
+        if i != previous:
+            lo = {'l': l, 'matchingOrder': [], 'trialEnergy': [], 'searchE': []}
+            los.append(lo)
+            previous = i
+        lo['matchingOrder'].append(matching_order)
+        lo['trialEnergy'].append(trial_energy)
+        lo['searchE'].append(search_e)
+    return los
+
+
+class CompactSpecies:
+    """ Species data, with atomic states and local orbitals held in structured arrays.
+
+    Construct from, and convert back to, the dictionary returned by parse_species_xml:
+
+        compact = CompactSpecies.from_dict(parse_species_xml('Ti.xml'))
+        species_dict = compact.to_dict()
+    """
+    __slots__ = ('species', 'muffin_tin', 'atomic_states', 'default', 'custom', 'lo')
+
+    def __init__(self, species: dict, muffin_tin: dict, atomic_states: np.ndarray,
+                 default: List[dict], custom: List[dict], lo: np.ndarray):
+        """
+        :param species: Species attributes.
+        :param muffin_tin: Muffin tin attributes.
+        :param atomic_states: Structured array with dtype atomic_state_dtype.
+        :param default: Default (l)apw functions.
+        :param custom: Custom (l)apw functions.
+        :param lo: Structured array with dtype lo_dtype.
+        """
+        self.species = species
+        self.muffin_tin = muffin_tin
+        self.atomic_states = atomic_states
+        self.default = default
+        self.custom = custom
+        self.lo = lo
+
+    @classmethod
+    def from_dict(cls, species: dict):
+        """ Construct from the dictionary returned by parse_species_xml.
+        """
+        basis = species['basis']
+        return cls(species['species'],
+                   species['muffin_tin'],
+                   atomic_states_to_array(species['atomic_states']),
+                   basis['default'],
+                   basis['custom'],
+                   los_to_array(basis['lo']))
+
+    def to_dict(self) -> dict:
+        """ Convert to the dictionary returned by parse_species_xml.
+        """
+        return {'species': self.species,
+                'muffin_tin': self.muffin_tin,
+                'atomic_states': array_to_atomic_states(self.atomic_states),
+                'basis': {'default': self.default,
+                          'custom': self.custom,
+                          'lo': array_to_los(self.lo)}}
+
+    @property
+    def n_los(self) -> int:
+        """ Total number of local orbitals.
+        """
+        return np.unique(self.lo['lo']).size
+
+    def los_per_channel(self, l_max: Optional[int] = None) -> np.ndarray:
+        """ Number of local orbitals per l-channel.
+
+        :param l_max: Optional maximum l-channel. Defaults to the largest l of the LOs.
+        :return: Number of LOs, indexed by l.
+        """
+        _, first_rows = np.unique(self.lo['lo'], return_index=True)
+        l_values = self.lo['l'][first_rows]
+        minlength = 0 if l_max is None else l_max + 1
+        return np.bincount(l_values, minlength=minlength)
+
+    def los_in_channel(self, l: int) -> np.ndarray:
+        """ Radial functions of all local orbitals in l-channel l.
+        """
+        return self.lo[self.lo['l'] == l]
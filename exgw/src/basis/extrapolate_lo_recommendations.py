@@ -0,0 +1,116 @@
+""" Extrapolate LO recommendations beyond node_max.
+
+LO recommendations are only computed up to the node_max used in the exciting run, and
+an LO cutoff above the largest recommendation energy of an l-channel is an error.
+Rather than rerunning exciting with a larger node_max, the recommendations can be
+extended by extrapolation.
+
+At high energy, the radial functions approach those of a particle in a spherical well,
+with energies that grow quadratically with the number of nodes n:
+
+  E(n) ~ (pi (n + l/2 + 1) / R_MT)^2 / 2
+
+so a quadratic in n is fit to the highest recommendations of each l-channel, and
+evaluated at larger n. Extrapolated energies are flagged, such that they can be checked
+against a later lorecommendations run with a larger node_max (see extrapolation_error).
+"""
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from exgw.src.basis.optimised_basis import lo_cutoff_array
+
+
+def fit_recommendation_growth(recommendations: np.ndarray, n_fit: int = 6) -> np.ndarray:
+    """ Fit E(n) = a n^2 + b n + c to the n_fit highest recommendations of each l-channel.
+
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    :param n_fit: Number of recommendations per l-channel to fit to.
+    :return: Coefficients (a, b, c) per l-channel, with shape (l_max+1, 3)
+    """
+    n_nodes_plus_one = recommendations.shape[1]
+    if n_fit < 3 or n_fit > n_nodes_plus_one:
+        raise ValueError(f'n_fit must be in [3, {n_nodes_plus_one}], not {n_fit}')
+
+    nodes = np.arange(n_nodes_plus_one - n_fit, n_nodes_plus_one)
+    coefficients = np.polyfit(nodes, recommendations[:, -n_fit:].T, deg=2).T
+
+    # Energies must increase with n for all extrapolated nodes, i.e. the fit is convex
+    # and its minimum lies within the fitted recommendations.
+    a, b, _ = coefficients.T
+    vertex = -b / (2 * np.where(a > 0, a, 1))
+    not_asymptotic = (a <= 0) | (vertex > nodes[-1])
+    if not_asymptotic.any():
+        l_values = np.nonzero(not_asymptotic)[0]
+        raise ValueError(f'For l={", ".join(str(l) for l in l_values)}, the LO recommendations do not grow '
+                         f'quadratically with the number of nodes, hence cannot be extrapolated.')
+
+    return coefficients
+
+
+def nodes_for_cutoff(coefficients: np.ndarray, cutoffs: np.ndarray) -> int:
+    """ Smallest number of nodes for which the fit reaches every cutoff.
+
+    Solve a n^2 + b n + c = cutoff for the larger root, per l-channel.
+
+    :param coefficients: Coefficients per l-channel, as returned by fit_recommendation_growth.
+    :param cutoffs: Cutoffs with shape (..., l_max + 1). See lo_cutoff_array.
+    :return: Number of nodes.
+    """
+    a, b, c = coefficients.T
+    defined = np.isfinite(cutoffs)
+    if not defined.any():
+        return 0
+    discriminant = np.maximum(b ** 2 - 4 * a * (c - np.where(defined, cutoffs, c)), 0)
+    nodes = (-b + np.sqrt(discriminant)) / (2 * a)
+    return int(np.ceil(nodes[defined].max()))
+
+
+def extrapolate_lo_recommendations(recommendations: np.ndarray,
+                                   node_max: Optional[int] = None,
+                                   lo_cutoff: Union[None, dict, List[dict], np.ndarray] = None,
+                                   n_fit: int = 6) -> Tuple[np.ndarray, np.ndarray]:
+    """ Extend LO recommendations to a larger node_max, or to cover LO cutoffs.
+
+    If both node_max and lo_cutoff are given, the larger of the two extensions is used.
+    Recommendations are never truncated.
+
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    :param node_max: Optional maximum number of nodes of the extended recommendations.
+    :param lo_cutoff: Optional LO cutoff per l-channel, a list of them, or cutoffs in array form.
+    The last recommendation of every l-channel is extended to at least its cutoff.
+    :param n_fit: Number of recommendations per l-channel to fit to.
+    :return: Extended recommendations, with shape = (l_max+1, node_max+1), and a mask of
+    the same shape that is True for extrapolated energies.
+    """
+    l_max_plus_one, n_nodes_plus_one = recommendations.shape
+    coefficients = fit_recommendation_growth(recommendations, n_fit)
+
+    node_max = n_nodes_plus_one - 1 if node_max is None else node_max
+    if lo_cutoff is not None:
+        cutoffs = lo_cutoff if isinstance(lo_cutoff, np.ndarray) else lo_cutoff_array(lo_cutoff, l_max_plus_one - 1)
+        node_max = max(node_max, nodes_for_cutoff(coefficients, cutoffs))
+
+    nodes = np.arange(n_nodes_plus_one, max(node_max + 1, n_nodes_plus_one))
+    a, b, c = coefficients.T
+    extrapolated_energies = a[:, np.newaxis] * nodes ** 2 + b[:, np.newaxis] * nodes + c[:, np.newaxis]
+
+    energies = np.concatenate((recommendations, extrapolated_energies), axis=1)
+    extrapolated = np.zeros(shape=energies.shape, dtype=bool)
+    extrapolated[:, n_nodes_plus_one:] = True
+
+    return energies, extrapolated
+
+
+def extrapolation_error(energies: np.ndarray, extrapolated: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """ Error in extrapolated LO recommendations, with respect to recommendations computed by exciting.
+
+    :param energies: Extended recommendations, as returned by extrapolate_lo_recommendations.
+    :param extrapolated: Mask of extrapolated energies, as returned by extrapolate_lo_recommendations.
+    :param reference: Recommendations computed with a larger node_max, with shape = (l_max+1, n_nodes+1)
+    :return: energies - reference for every extrapolated energy covered by the reference, and
+    NaN otherwise, with shape = (l_max+1, min(n_nodes, node_max)+1)
+    """
+    n_nodes_plus_one = min(energies.shape[1], reference.shape[1])
+    error = energies[:, :n_nodes_plus_one] - reference[:, :n_nodes_plus_one]
+    return np.where(extrapolated[:, :n_nodes_plus_one], error, np.nan)
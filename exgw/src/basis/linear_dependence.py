@@ -0,0 +1,71 @@
+""" Screen local orbitals for linear dependence.
+
+Near-equivalent LOs in the same l-channel, at best, hinder the SCF convergence and
+at worst, lead to linear dependence of the basis (and a crash). This only becomes
+apparent once exciting runs, so screen bases before writing any input files.
+
+Two LOs are considered near-equivalent if they are in the same l-channel, are
+constructed from radial functions with the same matching orders, and all of their
+trial energies differ by less than a tolerance.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def near_equivalent_lo_pairs(los: List[dict], tolerance: float = 1.e-2) -> Dict[int, List[Tuple[int, int]]]:
+    """ Find pairs of near-equivalent LOs, per l-channel.
+
+    LOs are grouped by l-channel and matching orders, then all pairs of each group are
+    compared at once, by broadcasting their trial energies.
+
+    :param los: Serialised LOs, for example basis['basis']['lo'].
+    :param tolerance: Trial energies closer than tolerance (in Ha) are considered equivalent.
+    :return: Pairs of LO indices (i, j), with i < j, per l-channel. Channels without
+    near-equivalent LOs map to an empty list.
+    """
+    groups = defaultdict(list)
+    for i, lo in enumerate(los):
+        groups[(lo['l'], tuple(lo['matchingOrder']))].append(i)
+
+    pairs: Dict[int, List[Tuple[int, int]]] = {l: [] for l in sorted({lo['l'] for lo in los})}
+
+    for (l, _), indices in groups.items():
+        if len(indices) < 2:
+            continue
+        indices = np.array(indices)
+        energies = np.array([los[i]['trialEnergy'] for i in indices])
+        max_difference = np.abs(energies[:, np.newaxis, :] - energies[np.newaxis, :, :]).max(axis=-1)
+        i, j = np.nonzero(np.triu(max_difference < tolerance, k=1))
+        pairs[l].extend(zip(indices[i].tolist(), indices[j].tolist()))
+
+    for l in pairs:
+        pairs[l].sort()
+
+    return pairs
+
+
+def screen_linear_dependence(basis: dict, tolerance: float = 1.e-2, drop: bool = False) -> Tuple[dict, dict]:
+    """ Screen all LOs of a basis, default and added, for near-equivalent LOs.
+
+    If drop is True, the second LO of each near-equivalent pair is removed. As default LOs
+    precede added LOs in each l-channel, added LOs are dropped in favour of default ones.
+
+    :param basis: Species basis, for example as returned by construct_optimised_basis.
+    :param tolerance: Trial energies closer than tolerance (in Ha) are considered equivalent.
+    :param drop: Drop near-equivalent LOs.
+    :return: The basis, with near-equivalent LOs removed if drop is True, and the
+    near-equivalent pairs of LO indices per l-channel, indexing the input basis.
+    """
+    los = basis['basis']['lo']
+    pairs = near_equivalent_lo_pairs(los, tolerance)
+
+    if not drop or not any(pairs.values()):
+        return basis, pairs
+
+    dropped = {j for channel_pairs in pairs.values() for _, j in channel_pairs}
+    screened_los = [lo for i, lo in enumerate(los) if i not in dropped]
+    screened_basis = {**basis, 'basis': {**basis['basis'], 'lo': screened_los}}
+
+    return screened_basis, pairs
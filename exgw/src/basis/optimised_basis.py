@@ -1,10 +1,12 @@
 """ Construct an optimised basis, containing high energy local orbitals
 for use in highly-converged GW calculations.
 """
-import copy
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Union
 import numpy as np
 
+from exgw.src.basis.compact_basis import CompactSpecies
+
 
 def maximum_pqn_per_valence_orbital(atomic_states: List[dict]) -> np.ndarray:
     """ Find the maximum orbital per l-channel.
@@ -97,11 +99,13 @@ def max_nodes_per_conduction_orbital(lo_block: List[dict]) -> dict:
     return pure_conduction_channel
 
 
-def max_nodes_per_orbital_channel(species: dict):
-    """
+def compute_max_nodes_per_orbital_channel(species: dict) -> dict:
+    """ Maximum number of nodes per l-channel, of the valence and conduction orbitals in a basis.
 
-    :param species:
-    :return:
+    Uncached. See max_nodes_per_orbital_channel.
+
+    :param species: Species data, as returned by parse_species_xml.
+    :return: Dict of max nodes per l-channel.
     """
     max_v_nodes = max_nodes_per_valence_orbital(species['atomic_states'])
     max_c_nodes = max_nodes_per_conduction_orbital(species['basis']['lo'])
@@ -120,6 +124,132 @@ def max_nodes_per_orbital_channel(species: dict):
     return {**max_v_nodes, **max_c_nodes}
 
 
+def max_nodes_per_valence_channel(atomic_states: np.ndarray) -> dict:
+    """ Vectorised equivalent of max_nodes_per_valence_orbital.
+
+    The largest principal quantum number of the valence states in each l-channel is
+    found with a single np.maximum.at over the atomic state table.
+
+    :param atomic_states: Structured array with dtype atomic_state_dtype.
+    :return: Dict of max valence nodes per l-channel.
+    """
+    l_max = atomic_states['l'].max()
+    valence = atomic_states[~atomic_states['core']]
+    pqn = np.zeros(shape=l_max + 1, dtype=int)
+    np.maximum.at(pqn, valence['l'], valence['n'])
+    nodes = n_radial_nodes(pqn, np.arange(0, l_max + 1))
+    return {l: int(n) for l, n in enumerate(nodes)}
+
+
+def max_nodes_per_conduction_channel(los: np.ndarray, threshold: float = -0.01) -> dict:
+    """ Vectorised equivalent of max_nodes_per_conduction_orbital.
+
+    The trial energy of each LO is the largest trial energy of its radial functions.
+    An l-channel is a pure conduction channel if all of its LO energies are >= threshold,
+    in which case its maximum number of nodes is the number of unique LO energies - 1.
+
+    LOs are sorted by (l, energy) once, after which the lowest energy and the number of
+    unique energies per l-channel are given by the boundaries between runs of equal values.
+    As in max_nodes_per_conduction_orbital, every l-channel from 0 to the largest l of the
+    LOs must contain at least one LO, else a ValueError is raised.
+
+    :param los: Structured array with dtype lo_dtype, with one row per radial function.
+    Rows of the same LO must be contiguous.
+    :param threshold: Conduction states start at ~ 0 Ha.
+    :return: Dict of max conduction nodes per l-channel.
+    """
+    if los.size == 0:
+        raise ValueError('Cannot identify conduction channels of a basis without LOs')
+
+    # Reduce radial functions to LOs
+    # Fields of a packed structured array are unaligned, hence copy before reducing
+    lo_index = np.array(los['lo'])
+    first_rows = np.flatnonzero(np.concatenate(([True], lo_index[1:] != lo_index[:-1])))
+    lo_energy = np.maximum.reduceat(np.array(los['trialEnergy']), first_rows)
+    lo_l = los['l'][first_rows]
+
+    order = np.lexsort((lo_energy, lo_l))
+    lo_l, lo_energy = lo_l[order], lo_energy[order]
+    new_channel = np.concatenate(([True], lo_l[1:] != lo_l[:-1]))
+    new_energy = new_channel | np.concatenate(([True], lo_energy[1:] != lo_energy[:-1]))
+
+    n_unique_energies = np.bincount(lo_l[new_energy])
+    channels = lo_l[new_channel]
+    if channels.size != channels[-1] + 1:
+        missing = sorted(set(range(0, channels[-1] + 1)) - set(channels.tolist()))
+        raise ValueError(f'l-channels {missing} contain no LOs, hence cannot be classified as valence or conduction')
+    conduction = channels[lo_energy[new_channel] >= threshold]
+
+    return {int(l): int(n_unique_energies[l]) - 1 for l in conduction}
+
+
+def compute_max_nodes_per_channel(species: CompactSpecies) -> dict:
+    """ Vectorised equivalent of compute_max_nodes_per_orbital_channel.
+
+    :param species: Species data, with atomic states and LOs in structured arrays.
+    :return: Dict of max nodes per l-channel.
+    """
+    max_v_nodes = max_nodes_per_valence_channel(species.atomic_states)
+    max_c_nodes = max_nodes_per_conduction_channel(species.lo)
+
+    for l in set(max_v_nodes).intersection(max_c_nodes):
+        if max_v_nodes[l] != max_c_nodes[l]:
+            raise ValueError(f"Cannot distinguish this l={l} channel between valence and conduction")
+
+    return {**max_v_nodes, **max_c_nodes}
+
+
+# Least-recently used cache of node analyses, keyed by species fingerprint
+_node_cache: OrderedDict = OrderedDict()
+node_cache_size = 256
+
+
+def species_fingerprint(species: dict) -> tuple:
+    """ Fingerprint of the species data that determines the node analysis.
+
+    Only the atomic states, and the l-value and trial energies of each LO contribute,
+    such that species files that differ in other respects share a fingerprint. The
+    fingerprint is a tuple, used directly as a dict key: hashing a serialisation of the
+    species costs more than the analysis it would skip.
+
+    :param species: Species data, as returned by parse_species_xml.
+    :return: Hashable fingerprint.
+    """
+    states = tuple([(state['n'], state['l'], state['core']) for state in species['atomic_states']])
+    los = tuple([(lo['l'], tuple(lo['trialEnergy'])) for lo in species['basis']['lo']])
+    return states, los
+
+
+def clear_node_cache():
+    """ Clear the cache of max_nodes_per_orbital_channel.
+    """
+    _node_cache.clear()
+
+
+def max_nodes_per_orbital_channel(species: dict) -> dict:
+    """ Maximum number of nodes per l-channel, of the valence and conduction orbitals in a basis.
+
+    Results are cached by species_fingerprint, such that the analysis is only performed once
+    per default basis, across all points of a sweep and all species sharing a default basis.
+    The cache holds the node_cache_size most-recently used results.
+
+    :param species: Species data, as returned by parse_species_xml.
+    :return: Dict of max nodes per l-channel.
+    """
+    key = species_fingerprint(species)
+
+    if key in _node_cache:
+        _node_cache.move_to_end(key)
+        return dict(_node_cache[key])
+
+    max_nodes = compute_max_nodes_per_orbital_channel(species)
+    _node_cache[key] = max_nodes
+    while len(_node_cache) > node_cache_size:
+        _node_cache.popitem(last=False)
+
+    return dict(max_nodes)
+
+
 def n_radial_nodes(pqn: int, l: int):
     """ Number of nodes in a radial function nl.
     :param pqn: principal QN
@@ -137,23 +267,50 @@ def filter_lowest_lo_recommendations(max_nodes: dict) -> np.ndarray:
     :param max_nodes: Dict of max nodes per l-channel.
     :return: Starting index per l-channel, for LO recommendations.
     """
-    l_max = max(list(max_nodes))
-    indices = np.empty(shape=(l_max + 1), dtype=np.int)
+    l_values = np.fromiter(max_nodes.keys(), dtype=int, count=len(max_nodes))
+    nodes = np.fromiter(max_nodes.values(), dtype=int, count=len(max_nodes))
 
-    for l in range(0, l_max + 1):
-        try:
-            # LO with most nodes, already in basis = max_nodes[l]
-            # so add one.
-            i_min = max_nodes[l] + 1
-        except KeyError:
-            # If l-channel not specified, set to zero
-            i_min = 0
-        indices[l] = int(i_min)
+    # If l-channel not specified, set to zero
+    indices = np.zeros(shape=l_values.max() + 1, dtype=int)
+    # LO with most nodes, already in basis = max_nodes[l]
+    # so add one.
+    indices[l_values] = nodes + 1
 
     return indices
 
 
-def filter_highest_lo_recommendations(lo_cutoff: dict, recommendations: np.ndarray) -> np.ndarray:
+def lo_cutoff_array(lo_cutoff: Union[dict, List[dict]], l_max: int) -> np.ndarray:
+    """ Convert LO cutoffs from dict to array form.
+
+    If an l-channel cut-off is not specified, it implies one does NOT want to add any
+    high-energy orbitals, hence the cut-off is set to -inf.
+
+    :param lo_cutoff: LO cutoff per l-channel, or a list of them.
+    :param l_max: Maximum l-channel.
+    :return: Cutoffs with shape (l_max + 1), or (len(lo_cutoff), l_max + 1) for a list of cutoffs.
+    """
+    lo_cutoffs = [lo_cutoff] if isinstance(lo_cutoff, dict) else lo_cutoff
+    cutoffs = np.full(shape=(len(lo_cutoffs), l_max + 1), fill_value=-np.inf)
+    for i, cutoff in enumerate(lo_cutoffs):
+        cutoffs[i, list(cutoff.keys())] = list(cutoff.values())
+    return cutoffs[0] if isinstance(lo_cutoff, dict) else cutoffs
+
+
+def check_lo_cutoffs(cutoffs: np.ndarray, recommendations: np.ndarray):
+    """ Check no LO cutoff exceeds the maximum energy of the LO recommendations in its l-channel.
+
+    :param cutoffs: Cutoffs with shape (..., l_max + 1). See lo_cutoff_array.
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    """
+    exceeds_max_energy = cutoffs > recommendations[:, -1]
+    if exceeds_max_energy.any():
+        l_values = np.nonzero(exceeds_max_energy.reshape(-1, recommendations.shape[0]).any(axis=0))[0]
+        raise ValueError(f'For l={", ".join(str(l) for l in l_values)}, the LO cutoff exceeds the maximum energy '
+                         f'in the LO recommendations.')
+
+
+def filter_highest_lo_recommendations(lo_cutoff: Union[dict, List[dict], np.ndarray],
+                                      recommendations: np.ndarray) -> np.ndarray:
     """ Filter out LO recommendations above a certain LO cutoff
 
     One is added to the index because array[:n] will return up to element n-1, and we
@@ -162,22 +319,112 @@ def filter_highest_lo_recommendations(lo_cutoff: dict, recommendations: np.ndarr
     If the cut-off for the l-channel is not defined, 0 is returned.
     NOTE: Perhaps np.nan would be better.
 
-    :param lo_cutoff:
-    :param recommendations:
-    :return:
+    The index is found with np.searchsorted, which assumes the recommendation energies of each
+    l-channel increase monotonically with the number of nodes. Cutoffs for a batch of bases are
+    resolved with one np.searchsorted per l-channel.
+
+    :param lo_cutoff: LO cutoff per l-channel, a list of them, or cutoffs in array form (see lo_cutoff_array).
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    :return: Last index per l-channel, with shape (l_max + 1), or (n_cutoffs, l_max + 1) for a batch of cutoffs.
     """
     l_max_plus_one, nodes_max_plus_one = recommendations.shape
-    indices = np.empty(shape=l_max_plus_one, dtype=np.int)
-    # If an l-channel cut-off is not specified, it implies one does NOT want to add any high-energy orbitals
-    # hence initialise to zero.
-    indices.fill(0)
+    if isinstance(lo_cutoff, np.ndarray):
+        cutoffs = lo_cutoff
+    else:
+        cutoffs = lo_cutoff_array(lo_cutoff, l_max_plus_one - 1)
 
-    for l, cutoff in lo_cutoff.items():
-        indices[l] = np.max(np.argwhere(recommendations[l, :] <= cutoff)) + 1
+    indices = np.empty(shape=cutoffs.shape, dtype=int)
+    for l in range(0, l_max_plus_one):
+        indices[..., l] = np.searchsorted(recommendations[l, :], cutoffs[..., l], side='right')
 
     return indices
 
 
+def select_lo_windows(max_nodes: dict,
+                      lo_cutoff: Union[dict, List[dict]],
+                      recommendations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Select the window of LO recommendations to add to a basis, for every l-channel.
+
+    LOs recommendations[l, first[l]:last[l]] are above those already in the basis, and
+    below the LO cutoff.
+
+    :param max_nodes: Dict of max nodes per l-channel, of the default basis.
+    :param lo_cutoff: LO cutoff per l-channel, or a list of them.
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    :return: first, with shape (l_max + 1), and last, with shape (l_max + 1) or
+    (len(lo_cutoff), l_max + 1) for a list of cutoffs.
+    """
+    l_max_plus_one = recommendations.shape[0]
+    cutoffs = lo_cutoff_array(lo_cutoff, l_max_plus_one - 1)
+    check_lo_cutoffs(cutoffs, recommendations)
+
+    first_indices = lowest_lo_indices(max_nodes, l_max_plus_one)
+    last_indices = filter_highest_lo_recommendations(cutoffs, recommendations)
+
+    return first_indices, last_indices
+
+
+def lowest_lo_indices(max_nodes: dict, l_max_plus_one: int) -> np.ndarray:
+    """ filter_lowest_lo_recommendations, padded or truncated to l_max_plus_one l-channels.
+    """
+    first_indices = np.zeros(shape=l_max_plus_one, dtype=int)
+    lowest = filter_lowest_lo_recommendations(max_nodes)[:l_max_plus_one]
+    first_indices[:lowest.shape[0]] = lowest
+    return first_indices
+
+
+def los_per_channel(los: List[dict], l_max: int) -> np.ndarray:
+    """ Number of LOs per l-channel.
+
+    :param los: Serialised LOs.
+    :param l_max: Maximum l-channel.
+    :return: Number of LOs, indexed by l, for l = [0, l_max].
+    """
+    l_values = np.array([lo['l'] for lo in los], dtype=int)
+    return np.bincount(l_values[l_values <= l_max], minlength=l_max + 1)
+
+
+def select_lo_windows_by_count(max_nodes: dict,
+                               n_default_los: np.ndarray,
+                               n_los: Union[dict, List[dict]],
+                               recommendations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Select the window of LO recommendations to add to a basis, such that every l-channel
+    contains a target number of LOs.
+
+    n_los[l] is the total number of LOs in l-channel l, including the LOs of the default basis.
+    Each LO recommendation adds two LOs (see serialised_local_orbitals), hence
+    (n_los[l] - n_default_los[l]) // 2 recommendations are added. If the target is odd with respect
+    to the default basis, the channel holds one LO fewer than n_los[l]. If an l-channel target is
+    not specified, or is not larger than the number of default LOs, no LOs are added.
+
+    :param max_nodes: Dict of max nodes per l-channel, of the default basis.
+    :param n_default_los: Number of LOs per l-channel in the default basis, with shape (l_max + 1).
+    See los_per_channel.
+    :param n_los: Target number of LOs per l-channel, or a list of them.
+    :param recommendations: LO recommendations, with shape = (l_max+1, n_nodes+1)
+    :return: first, with shape (l_max + 1), and last, with shape (l_max + 1) or
+    (len(n_los), l_max + 1) for a list of targets.
+    """
+    l_max_plus_one, node_max_plus_one = recommendations.shape
+    targets = lo_cutoff_array(n_los, l_max_plus_one - 1)
+    first_indices = lowest_lo_indices(max_nodes, l_max_plus_one)
+
+    n_default = np.zeros(shape=l_max_plus_one, dtype=int)
+    n_default[:min(l_max_plus_one, len(n_default_los))] = n_default_los[:l_max_plus_one]
+
+    # Undefined targets are -inf, hence add no recommendations
+    n_added = np.floor_divide(np.maximum(targets - n_default, 0), 2).astype(int)
+    last_indices = first_indices + n_added
+
+    exceeds_recommendations = last_indices > node_max_plus_one
+    if exceeds_recommendations.any():
+        l_values = np.nonzero(exceeds_recommendations.reshape(-1, l_max_plus_one).any(axis=0))[0]
+        raise ValueError(f'For l={", ".join(str(l) for l in l_values)}, the number of LOs requested exceeds the '
+                         f'number available from the LO recommendations.')
+
+    return first_indices, last_indices
+
+
 def serialised_local_orbitals(l_value: int, linearisation_energies: np.ndarray) -> List[dict]:
     """ Create serialised local orbital data, following a fixed pattern.
 
@@ -232,27 +479,58 @@ def serialise_optimised_los(default_los: List[dict], conduction_los: List[List[d
     return optimised_los
 
 
-def initialise_optimised_basis(default_basis: dict, l_max: int):
+def initialise_optimised_basis(default_basis: dict, l_max: int) -> dict:
+    """ Initialise an optimised basis from the default basis.
+
+    The optimised basis is structurally shared with the default basis: the 'species',
+    'muffin_tin' and 'atomic_states' sections, and basis['default'], are the default
+    basis' objects, hence must be treated as read-only. To change one of them in a
+    single basis, replace it rather than modifying it in place.
+
+    Only the sections that vary between optimised bases are new objects:
+    basis['custom'], which only keeps (l)apws up to l_max, and basis['lo'], which
+    initially contains the default LOs.
+
+    :param default_basis: Default basis in serialised form.
+    :param l_max: Maximum l-channel of the optimised basis.
+    :return: Optimised basis, containing the default LOs.
     """
-    DOCUMENT ME
-    :param default_basis:
-    :param l_max:
-    :return:
+    basis = default_basis['basis']
+    return {'species': default_basis['species'],
+            'muffin_tin': default_basis['muffin_tin'],
+            'atomic_states': default_basis['atomic_states'],
+            'basis': {'default': basis['default'],
+                      'custom': [lapw for lapw in basis['custom'] if lapw['l'] <= l_max],
+                      'lo': list(basis['lo'])}}
+
+
+def _lo_windows(default_basis: dict,
+                lo_recommendations: np.ndarray,
+                lo_cutoff: Union[None, dict, List[dict]],
+                n_los: Union[None, dict, List[dict]],
+                max_nodes: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ Select the LO recommendation windows for either an LO cutoff or a number of LOs.
     """
-    # Should only keep lapws up to l_max
-    optimised_basis = copy.deepcopy(default_basis)
-    filtered_lapws = []
-    for lapw in optimised_basis['basis']['custom']:
-        if lapw['l'] <= l_max:
-            filtered_lapws.append(lapw)
-    optimised_basis['basis']['custom'] = filtered_lapws
+    if (lo_cutoff is None) == (n_los is None):
+        raise ValueError('Specify exactly one of an LO cutoff or a number of LOs per l-channel')
+
+    if max_nodes is None:
+        max_nodes = max_nodes_per_orbital_channel(default_basis)
+
+    if lo_cutoff is not None:
+        return select_lo_windows(max_nodes, lo_cutoff, lo_recommendations)
+
+    n_default_los = los_per_channel(default_basis['basis']['lo'], lo_recommendations.shape[0] - 1)
+    return select_lo_windows_by_count(max_nodes, n_default_los, n_los, lo_recommendations)
 
 
 # TODO(Alex) Check this explanation
 def construct_optimised_basis(default_basis: dict,
                               lo_recommendations: np.ndarray,
                               l_max: int,
-                              lo_cutoff: dict) -> dict:
+                              lo_cutoff: Optional[dict] = None,
+                              n_los: Optional[dict] = None,
+                              max_nodes: Optional[dict] = None) -> dict:
     """ Return the local orbitals defined up to the LO cutoff, with trial energies
     set according to LO recommendations.
 
@@ -272,10 +550,23 @@ def construct_optimised_basis(default_basis: dict,
     defines the valence as 3s 3p 3d 4s. This does not guarantee that the corresponding
     LOs are explicitly defined in the species file.
 
+    Modes
+    -----
+    LOs are added according to exactly one of:
+      lo_cutoff: An energy cutoff per l-channel, for example {0: 150, 1: 150, 2: 150, 3: 150}.
+      n_los: A total number of LOs per l-channel, including the default LOs, for example
+             {0: 8, 1: 8, 2: 8, 3: 5}. This controls the size of the Hamiltonian.
+             See select_lo_windows_by_count.
+
     :param default_basis: Default basis in serialised form.
     :param lo_recommendations: LO energy recommendations, with shape = (l_max+1, n_nodes+1)
+    :param l_max: Maximum l-channel of the optimised basis.
+    :param lo_cutoff: LO energy cutoff per l-channel.
+    :param n_los: Number of LOs per l-channel.
+    :param max_nodes: Optional max nodes per l-channel of the default basis, as returned by
+    max_nodes_per_orbital_channel. Pass when constructing many bases from the same default basis.
     :return: Dictionary of the default_basis, with extra LOs added from l=[0, l_max],
-    according to the LO recommendation energies and the lo_cutoff.
+    according to the LO recommendation energies and the lo_cutoff or n_los.
     """
     recommendations_l_max, recommendations_node_max = [x - 1 for x in lo_recommendations.shape]
 
@@ -283,24 +574,7 @@ def construct_optimised_basis(default_basis: dict,
         raise ValueError(f'LO recommendations go up to l={recommendations_l_max}, however'
                          f'l_max requested is {l_max}')
 
-    for l, cutoff in lo_cutoff.items():
-        max_energy = lo_recommendations[l, -1]
-        if cutoff > max_energy:
-            raise ValueError(f'For l={l}, the LO cutoff exceeds the maximum energy '
-                             f'in the LO recommendations.')
-
-    max_nodes = max_nodes_per_orbital_channel(default_basis)
-    first_indices = filter_lowest_lo_recommendations(max_nodes)
-
-    # If l_max exceeds that already present in the basis, pad first_indices with zeros
-    if first_indices.shape[0] < (l_max + 1):
-        size_diff = (l_max + 1) - first_indices.shape[0]
-        padding = np.zeros(shape=size_diff, dtype=np.int)
-        first_indices = np.concatenate((first_indices, padding), axis=0)
-
-    last_indices = filter_highest_lo_recommendations(lo_cutoff, lo_recommendations)
-    assert last_indices.shape[0] == lo_recommendations.shape[0], \
-        'l_max for last_indices set by lo_recommendations, not the input l_max'
+    first_indices, last_indices = _lo_windows(default_basis, lo_recommendations, lo_cutoff, n_los, max_nodes)
 
     # Create new LOs with the filtered LO recommendations
     # If l-channel has no cut-off, then last_indices[l] = 0, which kills its contribution
@@ -318,6 +592,50 @@ def construct_optimised_basis(default_basis: dict,
     return optimised_basis
 
 
+def construct_optimised_bases(default_basis: dict,
+                              lo_recommendations: np.ndarray,
+                              l_max_values: List[int],
+                              lo_cutoffs: Optional[List[dict]] = None,
+                              n_los: Optional[List[dict]] = None) -> List[List[dict]]:
+    """ Construct an optimised basis for every combination of l_max and LO cutoff (or number of LOs).
+
+    Batched equivalent of construct_optimised_basis, such that:
+      bases[i][j] == construct_optimised_basis(default_basis, lo_recommendations, l_max_values[i], lo_cutoffs[j])
+    or
+      bases[i][j] == construct_optimised_basis(default_basis, lo_recommendations, l_max_values[i], n_los=n_los[j])
+
+    The node analysis of the default basis is only performed once, and the last LO recommendation
+    of every cutoff is found with a single np.searchsorted per l-channel. This assumes the
+    recommendation energies of each l-channel increase monotonically with the number of nodes.
+
+    :param default_basis: Default basis in serialised form.
+    :param lo_recommendations: LO energy recommendations, with shape = (l_max+1, n_nodes+1)
+    :param l_max_values: Maximum l-channel of each basis.
+    :param lo_cutoffs: LO energy cutoff per l-channel, of each basis.
+    :param n_los: Number of LOs per l-channel, of each basis.
+    :return: Optimised bases, indexed [l_max index][cutoff index].
+    """
+    recommendations_l_max = lo_recommendations.shape[0] - 1
+
+    if max(l_max_values) > recommendations_l_max:
+        raise ValueError(f'LO recommendations go up to l={recommendations_l_max}, however'
+                         f'l_max requested is {max(l_max_values)}')
+
+    first_indices, last_indices = _lo_windows(default_basis, lo_recommendations, lo_cutoffs, n_los)
+
+    bases = []
+    for l_max in l_max_values:
+        bases_l_max = []
+        for i in range(0, last_indices.shape[0]):
+            los_by_lvalue = [serialised_local_orbitals(l, lo_recommendations[l, first_indices[l]:last_indices[i, l]])
+                             for l in range(0, l_max + 1)]
+            optimised_basis = initialise_optimised_basis(default_basis, l_max)
+            optimised_basis['basis']['lo'] = serialise_optimised_los(default_basis['basis']['lo'], los_by_lvalue, l_max)
+            bases_l_max.append(optimised_basis)
+        bases.append(bases_l_max)
+
+    return bases
+
 
 
 # Mapping in lo-recommendations from nodes (used as index) to nl
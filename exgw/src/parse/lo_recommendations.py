@@ -0,0 +1,62 @@
+""" Container for LO recommendations of all species
+"""
+from collections.abc import Mapping
+from typing import Iterator, List
+
+import numpy as np
+
+
+class LORecommendations(Mapping):
+    """ LO recommendation energies of all species, held in one contiguous array.
+
+    energies.shape = (n_species, l_max + 1, node_max + 1)
+
+    Indexing by species label returns a view of energies, with shape (l_max + 1, node_max + 1),
+    hence it behaves like the dictionary previously returned by parse_lorecommendations:
+
+        recommendations['ti'][l, n]
+
+    Operations over all species, such as applying the same cutoff to every species, can
+    be performed on energies directly.
+    """
+    def __init__(self, species: List[str], energies: np.ndarray):
+        """
+        :param species: Species labels, in the order they are given in exciting's input.
+        :param energies: Recommendation energies, with shape (n_species, l_max + 1, node_max + 1).
+        """
+        if energies.ndim != 3:
+            raise ValueError(f'Expect energies with shape (n_species, l_max + 1, node_max + 1), '
+                             f'not {energies.shape}')
+
+        if len(species) != energies.shape[0]:
+            raise ValueError(f'Recommendations contain {energies.shape[0]} species, however '
+                             f'{len(species)} species labels were given: {species}')
+
+        self.species = list(species)
+        self.energies = energies
+        self._index = {label: i for i, label in enumerate(self.species)}
+
+    @property
+    def l_max(self) -> int:
+        return self.energies.shape[1] - 1
+
+    @property
+    def node_max(self) -> int:
+        return self.energies.shape[2] - 1
+
+    def index(self, label: str) -> int:
+        """ Index of a species in energies.
+        """
+        return self._index[label]
+
+    def __getitem__(self, label: str) -> np.ndarray:
+        return self.energies[self._index[label]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.species)
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def __repr__(self):
+        return f'LORecommendations(species={self.species}, shape={self.energies.shape})'
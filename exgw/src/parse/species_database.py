@@ -0,0 +1,196 @@
+""" Index of a directory of species files
+"""
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from exgw.src.parse.parsers import parse_species_xml, species_files
+from exgw.src.write.incremental import atomic_write
+
+
+def species_index_entry(species: dict) -> dict:
+    """ Summarise parsed species data as an index entry.
+
+    For example:
+    {'chemicalSymbol': 'Zn', 'name': 'zinc', 'z': -30.0, 'mass': 119198.678,
+     'muffin_tin': {'rmin': 1e-06, 'radius': 2.0, 'rinf': 21.8982, 'radialmeshPoints': 600.0},
+     'l_max': 5,
+     'n_los': [4, 2, 2, 2, 2, 2]}
+
+    where l_max is the largest l-channel of the (l)apw functions and LOs, and n_los[l]
+    is the number of LOs in l-channel l. A basis with neither custom functions nor LOs
+    has l_max = 0.
+
+    :param species: Species data, as returned by parse_species_xml.
+    :return: Index entry.
+    """
+    basis = species['basis']
+    lo_l_values = np.array([lo['l'] for lo in basis['lo']], dtype=int)
+    l_max = max([function['l'] for function in basis['custom']] + lo_l_values.tolist(), default=0)
+
+    return {'chemicalSymbol': species['species']['chemicalSymbol'],
+            'name': species['species'].get('name'),
+            'z': species['species']['z'],
+            'mass': species['species']['mass'],
+            'muffin_tin': dict(species['muffin_tin']),
+            'l_max': int(l_max),
+            'n_los': np.bincount(lo_l_values, minlength=l_max + 1).tolist()}
+
+
+def file_sha256(file_name: str) -> str:
+    """ SHA-256 of a file's contents.
+    """
+    with open(file_name, 'rb') as fid:
+        return hashlib.sha256(fid.read()).hexdigest()
+
+
+class SpeciesDatabase:
+    """ Index of the species files in a directory.
+
+    The directory is scanned once, and a compact index of each species is persisted to
+    index_file. On subsequent scans, only files whose modification time or size changed
+    are re-hashed, and only files whose contents changed are re-parsed. This includes
+    files that failed to parse, which are reported in errors until they change.
+
+    As in parse_species_files, a chemical symbol defined by more than one file is only
+    indexed for the first file (by name), and the others are reported in errors.
+
+    Lookups and queries are answered from the index, without touching the XML:
+
+        database = SpeciesDatabase('species')
+        database.by_symbol('Zn')['n_los']
+        database.with_more_los_than(4, l=3)
+
+    Full species data is only parsed on request, with load.
+    """
+    index_version = 1
+
+    def __init__(self, directory: str, index_file: Optional[str] = None):
+        """
+        :param directory: Directory of species files.
+        :param index_file: Optional index file. Defaults to {directory}/.species_index.json
+        """
+        self.directory = directory
+        self.index_file = os.path.join(directory, '.species_index.json') if index_file is None else index_file
+        # Index entries, keyed by file name relative to directory
+        self.entries: Dict[str, dict] = self._read_index()
+        # Species files that failed to parse or duplicate a chemical symbol, with the corresponding error
+        self.errors: Dict[str, Exception] = {}
+        # Entries of files that failed to parse (with key 'error'), and of duplicate species, by file name
+        self._failed: Dict[str, dict] = {}
+        self._duplicates: Dict[str, dict] = {}
+        self.update()
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(self.index_file, 'r') as fid:
+                index = json.load(fid)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return {}
+
+        if index.get('version') != self.index_version:
+            return {}
+        return index['entries']
+
+    def _write_index(self):
+        atomic_write(self.index_file, json.dumps({'version': self.index_version, 'entries': self.entries}).encode())
+
+    def update(self) -> List[str]:
+        """ Rescan the directory, re-parsing only species files that changed.
+
+        :return: Files that were (re-)parsed.
+        """
+        previous = {**self._failed, **self._duplicates, **self.entries}
+        indexed = {}
+        parsed = []
+        self.errors = {}
+        self._failed = {}
+
+        for file_name in species_files(self.directory):
+            name = os.path.basename(file_name)
+            stat = os.stat(file_name)
+            entry = previous.get(name)
+
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                sha256 = file_sha256(file_name)
+                if entry is not None and entry['sha256'] == sha256:
+                    entry = {**entry, 'mtime': stat.st_mtime, 'size': stat.st_size}
+                else:
+                    try:
+                        entry = species_index_entry(parse_species_xml(file_name, backend='expat'))
+                        parsed.append(name)
+                    except Exception as error:
+                        entry = {'error': error}
+                    entry.update({'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': sha256})
+
+            if 'error' in entry:
+                self.errors[file_name] = entry['error']
+                self._failed[name] = entry
+            else:
+                indexed[name] = entry
+
+        entries = {}
+        symbols = set()
+        self._duplicates = {}
+        for name, entry in indexed.items():
+            symbol = entry['chemicalSymbol']
+            if symbol in symbols:
+                self.errors[os.path.join(self.directory, name)] = \
+                    ValueError(f'Chemical symbol {symbol} is defined by more than one species file')
+                self._duplicates[name] = entry
+                continue
+            symbols.add(symbol)
+            entries[name] = entry
+
+        if entries != self.entries or not os.path.isfile(self.index_file):
+            self.entries = entries
+            self._write_index()
+
+        return parsed
+
+    def select(self, predicate: Callable[[dict], bool]) -> List[str]:
+        """ Chemical symbols of all species whose index entry satisfies predicate.
+        """
+        return [entry['chemicalSymbol'] for entry in self.entries.values() if predicate(entry)]
+
+    def file_name(self, symbol: str) -> str:
+        """ Species file defining chemical symbol.
+        """
+        for name, entry in self.entries.items():
+            if entry['chemicalSymbol'] == symbol:
+                return os.path.join(self.directory, name)
+        raise KeyError(f'No species file with chemical symbol {symbol} in {self.directory}')
+
+    def by_symbol(self, symbol: str) -> dict:
+        """ Index entry of a species, by chemical symbol.
+        """
+        return self.entries[os.path.basename(self.file_name(symbol))]
+
+    def by_z(self, z: float) -> dict:
+        """ Index entry of a species, by atomic number.
+
+        exciting stores z as a negative number, hence the magnitudes are compared.
+        """
+        for entry in self.entries.values():
+            if abs(entry['z']) == abs(z):
+                return entry
+        raise KeyError(f'No species file with z = {z} in {self.directory}')
+
+    def with_more_los_than(self, n_los: int, l: int) -> List[str]:
+        """ Chemical symbols of all species with more than n_los LOs in l-channel l.
+        """
+        return self.select(lambda entry: l < len(entry['n_los']) and entry['n_los'][l] > n_los)
+
+    def load(self, symbol: str) -> dict:
+        """ Parse the full species data of a species, by chemical symbol.
+        """
+        return parse_species_xml(self.file_name(symbol), backend='expat')
+
+    def __contains__(self, symbol: str) -> bool:
+        return any(entry['chemicalSymbol'] == symbol for entry in self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,104 @@
+""" Input sources for XML parsers
+
+Resolve the input passed to an XML parser to data that can be fed directly to the
+parser, determining the type of input without trial-and-error parsing:
+
+ * ET.Element: Already parsed, returned as-is.
+ * bytes, bytearray: XML data.
+ * File object: Read.
+ * str: XML text if it starts with '<', else a file name.
+ * Path: File name.
+
+Files compressed with gzip, bzip2 or xz are identified by their extension and
+decompressed transparently. Large uncompressed files are memory-mapped rather than read.
+"""
+import bz2
+from contextlib import contextmanager
+import gzip
+import lzma
+import mmap
+import os
+from pathlib import Path
+from typing import Union
+import xml.etree.ElementTree as ET
+
+# Open functions for compressed files, by file extension
+compressed_openers = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+# Uncompressed files of at least this size (in bytes) are memory-mapped
+mmap_threshold = 1024 * 1024
+
+XMLData = Union[str, bytes, bytearray, mmap.mmap]
+
+
+def is_xml_text(input: str) -> bool:
+    """ Is a string XML text, rather than a file name.
+
+    XML documents must start with a tag (or declaration), optionally preceded by
+    whitespace or a byte order mark.
+    """
+    return input.lstrip(' \t\r\n﻿').startswith('<')
+
+
+@contextmanager
+def xml_source(input):
+    """ Resolve input to XML data that can be fed to an ElementTree or expat parser.
+
+    Usage:
+        with xml_source(input) as data:
+            parser.feed(data)
+
+    Any file opened or memory-mapped is closed on exit.
+
+    :param input: ET.Element, XML text, bytes, file object, file name or Path.
+    :return: ET.Element, or XML data as a str, bytes or memory-mapped file.
+    """
+    if isinstance(input, (ET.Element, bytes, bytearray)):
+        yield input
+        return
+
+    if hasattr(input, 'read'):
+        yield input.read()
+        return
+
+    if isinstance(input, str) and is_xml_text(input):
+        yield input
+        return
+
+    if not isinstance(input, (str, Path)):
+        raise TypeError(f'Cannot read XML from input of type {type(input)}')
+
+    file_name = Path(input)
+    if not file_name.is_file():
+        raise ValueError(f'Input string neither an XML file, nor valid XML: {input}')
+
+    opener = compressed_openers.get(file_name.suffix)
+    if opener is not None:
+        with opener(file_name, 'rb') as fid:
+            yield fid.read()
+        return
+
+    with open(file_name, 'rb') as fid:
+        size = os.fstat(fid.fileno()).st_size
+        if size < mmap_threshold:
+            yield fid.read()
+            return
+        with mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def xml_root(input) -> ET.Element:
+    """ Parse input to the root element of an ElementTree.
+
+    :param input: ET.Element, XML text, bytes, file object, file name or Path. See xml_source.
+    :return: Root element.
+    """
+    with xml_source(input) as data:
+        if isinstance(data, ET.Element):
+            return data
+        parser = ET.XMLParser()
+        try:
+            parser.feed(data)
+            return parser.close()
+        except ET.ParseError as error:
+            raise ValueError(f'Input is not valid XML: {error}')
@@ -1,6 +1,7 @@
 """ Utilities
 """
 import json
+from typing import Callable, Dict, Optional
 
 
 # TODO(Alex) Replace with JSON, like below.
@@ -30,3 +31,36 @@ def string_to_value(input: dict) -> dict:
             # Typically values that should not be converted, like 'some_string'
             output[key] = value
     return output
+
+
+def value_from_string(value: str):
+    """ Convert a single string value to an appropriate type.
+
+    Single-value equivalent of string_to_value.
+    """
+    try:
+        return json.loads(value)
+    except json.decoder.JSONDecodeError:
+        return value
+
+
+def compile_converter(schema: Dict[str, Callable], default: Optional[Callable] = None) -> Callable[[dict], dict]:
+    """ Compile a schema of per-key converters into a function that converts a dictionary of strings.
+
+    For example:
+      convert = compile_converter({'n': int, 'occ': float, 'core': str_to_bool})
+      convert({'n': '1', 'occ': '2.00000', 'core': 'true'}) == {'n': 1, 'occ': 2.0, 'core': True}
+
+    Keys are converted with a known type, rather than trying json.loads on every value.
+
+    :param schema: Converter per key.
+    :param default: Converter for keys not in the schema. Defaults to value_from_string.
+    :return: Function that converts a dictionary of string values.
+    """
+    get_converter = schema.get
+    default = value_from_string if default is None else default
+
+    def convert(input: dict) -> dict:
+        return {key: get_converter(key, default)(value) for key, value in input.items()}
+
+    return convert
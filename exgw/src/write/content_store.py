@@ -0,0 +1,95 @@
+""" Content-addressed store of files, shared between the directories of a sweep.
+
+Many files of a sweep are byte-identical between run directories, for example the
+input.xml, run script, or the species file of a species whose basis is not varied.
+Rather than writing a copy of each into every directory, each unique file is written
+once to a store under the sweep root, keyed by the SHA-256 of its content, and run
+directories get links to it:
+
+    store = ContentStore(root)
+    store.write(os.path.join(root, 'lmax4_locut20', 'input.xml'), input_xml)
+
+Hardlinks are used by default, falling back to symlinks if the filesystem does not
+support them (or the store is on a different device). Symlinks are relative, such that
+the sweep root can be moved.
+
+Linked files share their content, so must not be modified in place.
+"""
+import os
+from typing import Optional, Union
+
+from exgw.src.write.incremental import atomic_write, content_sha256, replace_atomically
+
+link_types = ('hardlink', 'symlink')
+
+
+class ContentStore:
+    """ Content-addressed store, under a sweep root.
+
+    Store files are written to {store_dir}/{sha256[:2]}/{sha256}.
+    """
+    def __init__(self, root: str, link: str = 'hardlink', store_dir: Optional[str] = None):
+        """
+        :param root: Root directory of the sweep.
+        :param link: Link type, 'hardlink' or 'symlink'.
+        :param store_dir: Optional store directory. Defaults to {root}/.store
+        """
+        if link not in link_types:
+            raise ValueError(f'link must be one of {link_types}, not {link}')
+        self.root = root
+        self.link = link
+        self.store_dir = os.path.join(root, '.store') if store_dir is None else store_dir
+        # Number of unique files written to the store, links (re)created, and links unchanged
+        self.n_written = 0
+        self.n_linked = 0
+        self.n_skipped = 0
+
+    def path(self, sha256: str) -> str:
+        """ Store path of the content with hash sha256.
+        """
+        return os.path.join(self.store_dir, sha256[:2], sha256)
+
+    def put(self, content: Union[str, bytes]) -> str:
+        """ Add content to the store, if not already present.
+
+        :param content: Content, where str is UTF-8 encoded.
+        :return: Store path of the content.
+        """
+        content = content.encode('utf-8') if isinstance(content, str) else content
+        store_file = self.path(content_sha256(content))
+        if not os.path.isfile(store_file):
+            os.makedirs(os.path.dirname(store_file), exist_ok=True)
+            atomic_write(store_file, content)
+            self.n_written += 1
+        return store_file
+
+    def _make_link(self, store_file: str, tmp_file: str):
+        if self.link == 'hardlink':
+            try:
+                os.link(store_file, tmp_file)
+                return
+            except OSError:
+                # Cross-device, or hardlinks not supported by the filesystem
+                pass
+        os.symlink(os.path.relpath(store_file, os.path.dirname(tmp_file)), tmp_file)
+
+    def write(self, file_name: str, content: Union[str, bytes]) -> bool:
+        """ Link file_name to content in the store, unless it is already linked to it.
+
+        :param file_name: File name.
+        :param content: Content, where str is UTF-8 encoded.
+        :return: True if the link was (re)created.
+        """
+        store_file = self.put(content)
+
+        try:
+            if os.path.samefile(file_name, store_file):
+                self.n_skipped += 1
+                return False
+        except FileNotFoundError:
+            pass
+
+        with replace_atomically(file_name) as tmp_file:
+            self._make_link(store_file, tmp_file)
+        self.n_linked += 1
+        return True
@@ -0,0 +1,180 @@
+""" Fan out a large file, such as the ground state STATE.OUT, to many run directories.
+
+Strategies, in order of decreasing preference for I/O:
+
+ * hardlink: New directory entry for the same file. No data written.
+ * symlink: Relative link to the file. No data written.
+ * reflink: Copy-on-write clone (btrfs, XFS, ...). No data written until modified.
+ * copy_file_range: Copy in the kernel, with os.copy_file_range, else os.sendfile.
+ * copy: shutil.copyfile.
+
+hardlink and symlink share the data between all run directories, such that a program
+that rewrites the file in place changes it for every calculation. reflink and the copies
+are independent of the source.
+
+If a strategy is not supported, for example reflink on ext4, or hardlink across devices,
+the fan-out falls back to the next strategy in fan_out_fallbacks, and reports the bytes
+actually written.
+"""
+import errno
+import os
+import shutil
+from typing import List, NamedTuple
+
+from exgw.src.write.incremental import replace_atomically
+
+# Falling back from links to copies, rather than between link types, as hard and symbolic
+# links are not interchangeable for files that are modified.
+fan_out_fallbacks = {'hardlink': ('hardlink', 'reflink', 'copy_file_range', 'copy'),
+                     'symlink': ('symlink', 'reflink', 'copy_file_range', 'copy'),
+                     'reflink': ('reflink', 'copy_file_range', 'copy'),
+                     'copy_file_range': ('copy_file_range', 'copy'),
+                     'copy': ('copy',)}
+
+# Linux ioctl request to clone a file, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+class FanOutResult(NamedTuple):
+    """ Outcome of placing a file at a destination.
+    """
+    destination: str
+    strategy: str
+    bytes_written: int
+
+
+def hardlink(source: str, destination: str) -> int:
+    """ Hardlink destination to source.
+    """
+    os.link(source, destination)
+    return 0
+
+
+def symlink(source: str, destination: str) -> int:
+    """ Symlink destination to source, with a relative path.
+    """
+    os.symlink(os.path.relpath(source, os.path.dirname(destination)), destination)
+    return 0
+
+
+def reflink(source: str, destination: str) -> int:
+    """ Clone source with the FICLONE ioctl. Raises OSError where unsupported.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, 'reflink requires fcntl')
+
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    return 0
+
+
+def kernel_copy(source: str, destination: str) -> int:
+    """ Copy source in the kernel, with os.copy_file_range, else os.sendfile.
+
+    A copy that ends before the size of source, for example if the file was truncated
+    during the copy, raises an OSError rather than returning a partial file.
+
+    :return: Bytes written.
+    """
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        copy = getattr(os, 'copy_file_range', None)
+        offset = 0
+        while offset < size:
+            if copy is not None:
+                try:
+                    n_bytes = copy(src.fileno(), dst.fileno(), size - offset)
+                except OSError as error:
+                    if offset > 0 or error.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                        raise
+                    copy = None
+                    continue
+            else:
+                n_bytes = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+            if n_bytes == 0:
+                break
+            offset += n_bytes
+    if offset != size:
+        raise OSError(errno.EIO, f'Kernel copy of {source} stopped after {offset} of {size} bytes')
+    return offset
+
+
+def copy(source: str, destination: str) -> int:
+    """ Copy source with shutil.copyfile.
+
+    :return: Bytes written.
+    """
+    shutil.copyfile(source, destination)
+    return os.stat(destination).st_size
+
+
+fan_out_functions = {'hardlink': hardlink,
+                     'symlink': symlink,
+                     'reflink': reflink,
+                     'copy_file_range': kernel_copy,
+                     'copy': copy}
+
+
+def is_current(source: str, destination: str) -> bool:
+    """ Is destination already the source, or a copy of it from a previous fan-out.
+
+    Copies are given the modification time of the source, such that they can be
+    identified without reading them.
+    """
+    try:
+        if os.path.samefile(source, destination):
+            return True
+        src, dst = os.stat(source), os.stat(destination)
+    except FileNotFoundError:
+        return False
+    return src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns
+
+
+def fan_out_file(source: str, destination: str, strategy: str = 'reflink') -> FanOutResult:
+    """ Place source at destination, with the first supported strategy of fan_out_fallbacks[strategy].
+
+    Destinations that are already current are left untouched, with strategy 'unchanged'.
+    Otherwise, destination is created under a temporary name and renamed.
+
+    :param source: Source file.
+    :param destination: Destination file.
+    :param strategy: Preferred strategy. See fan_out_fallbacks.
+    :return: Destination, strategy used, and bytes written.
+    """
+    if strategy not in fan_out_fallbacks:
+        raise ValueError(f'strategy must be one of {tuple(fan_out_fallbacks)}, not {strategy}')
+
+    if is_current(source, destination):
+        return FanOutResult(destination, 'unchanged', 0)
+
+    with replace_atomically(destination) as tmp_file:
+        for fallback in fan_out_fallbacks[strategy]:
+            if os.path.lexists(tmp_file):
+                os.remove(tmp_file)
+            try:
+                bytes_written = fan_out_functions[fallback](source, tmp_file)
+            except OSError:
+                if fallback == 'copy':
+                    raise
+                continue
+
+            if fallback not in ('hardlink', 'symlink'):
+                stat = os.stat(source)
+                os.utime(tmp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            break
+
+    return FanOutResult(destination, fallback, bytes_written)
+
+
+def fan_out(source: str, destinations: List[str], strategy: str = 'reflink') -> List[FanOutResult]:
+    """ Place source at every destination. See fan_out_file.
+
+    :param source: Source file.
+    :param destinations: Destination files.
+    :param strategy: Preferred strategy. See fan_out_fallbacks.
+    :return: Result per destination. The total bytes written is
+    sum(result.bytes_written for result in results).
+    """
+    return [fan_out_file(source, destination, strategy) for destination in destinations]
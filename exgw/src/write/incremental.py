@@ -0,0 +1,166 @@
+""" Skip-if-unchanged writing of generated files.
+
+Regenerating the inputs of a sweep typically reproduces most files exactly. Rewriting
+them is wasted I/O on a parallel filesystem, and resets modification times that job
+tooling may depend on. Here, files are only written if their content changed, as
+judged by a SHA-256 hash of the content:
+
+    manifest = WriteManifest(root)
+    manifest.write(os.path.join(root, 'lmax4_locut20', 'input.xml'), input_xml)
+    manifest.save()
+
+The manifest records the hash, size and modification time of every file it wrote, such
+that unchanged files are identified with a single os.stat, without reading them. Files
+not in the manifest, or modified since, are hashed before deciding. Changed files are
+written to a uniquely-named temporary file and renamed, such that a file is never partially
+written, and concurrent writers of the same file do not share a temporary file.
+"""
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, Iterator, Optional, Union
+
+
+def content_sha256(content: bytes) -> str:
+    """ SHA-256 of content.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+@contextmanager
+def replace_atomically(file_name: str) -> Iterator[str]:
+    """ Yield a unique temporary file name in the directory of file_name, to be created by the caller.
+
+    On exit, the temporary file is renamed to file_name. If an exception is raised, the
+    temporary file is removed instead, and file_name is left untouched:
+
+        with replace_atomically(file_name) as tmp_file:
+            os.link(source, tmp_file)
+
+    The temporary file is not created here, such that it may be a link, and regular files
+    get the permissions of the process umask (unlike tempfile.NamedTemporaryFile).
+
+    :param file_name: File name.
+    :return: Temporary file name.
+    """
+    tmp_file = f'{file_name}.{uuid.uuid4().hex}.tmp'
+    try:
+        yield tmp_file
+        os.replace(tmp_file, file_name)
+    except BaseException:
+        if os.path.lexists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def atomic_write(file_name: str, content: bytes):
+    """ Write content to a temporary file in the same directory, and rename it to file_name.
+    """
+    with replace_atomically(file_name) as tmp_file:
+        with open(tmp_file, 'xb') as fid:
+            fid.write(content)
+
+
+def file_matches(file_name: str, sha256: str, size: int) -> bool:
+    """ Does an existing file have the given content hash.
+
+    Only files of the same size are read.
+    """
+    try:
+        if os.stat(file_name).st_size != size:
+            return False
+        with open(file_name, 'rb') as fid:
+            return content_sha256(fid.read()) == sha256
+    except FileNotFoundError:
+        return False
+
+
+def write_if_changed(file_name: str, content: Union[str, bytes]) -> bool:
+    """ Write content to file_name, unless the file already has this content.
+
+    Without a manifest, an existing file of the same size is read and hashed. See WriteManifest.
+
+    :param file_name: File name.
+    :param content: Content, where str is UTF-8 encoded.
+    :return: True if the file was written.
+    """
+    content = content.encode('utf-8') if isinstance(content, str) else content
+    if file_matches(file_name, content_sha256(content), len(content)):
+        return False
+    atomic_write(file_name, content)
+    return True
+
+
+class WriteManifest:
+    """ Record of the files written under a root directory, used to skip unchanged writes.
+
+    Entries are keyed by file name relative to root, and hold the SHA-256, size and
+    modification time (ns) of the file as written.
+    """
+    manifest_version = 1
+
+    def __init__(self, root: str, manifest_file: Optional[str] = None):
+        """
+        :param root: Root directory of all files written.
+        :param manifest_file: Optional manifest file. Defaults to {root}/.write_manifest.json
+        """
+        self.root = root
+        self.manifest_file = os.path.join(root, '.write_manifest.json') if manifest_file is None else manifest_file
+        self.entries: Dict[str, dict] = self._read_manifest()
+        # Number of files written and skipped since construction
+        self.n_written = 0
+        self.n_skipped = 0
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_file, 'r') as fid:
+                manifest = json.load(fid)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return {}
+
+        if manifest.get('version') != self.manifest_version:
+            return {}
+        return manifest['entries']
+
+    def save(self):
+        """ Write the manifest to manifest_file, if any entry changed.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_file)), exist_ok=True)
+        write_if_changed(self.manifest_file, json.dumps({'version': self.manifest_version, 'entries': self.entries}))
+
+    @staticmethod
+    def _stat_matches(file_name: str, entry: dict) -> bool:
+        try:
+            stat = os.stat(file_name)
+        except FileNotFoundError:
+            return False
+        return entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def write(self, file_name: str, content: Union[str, bytes]) -> bool:
+        """ Write content to file_name, unless the file already has this content.
+
+        :param file_name: File name, under root.
+        :param content: Content, where str is UTF-8 encoded.
+        :return: True if the file was written.
+        """
+        content = content.encode('utf-8') if isinstance(content, str) else content
+        sha256 = content_sha256(content)
+        key = os.path.relpath(file_name, self.root)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry['sha256'] == sha256 and self._stat_matches(file_name, entry):
+            self.n_skipped += 1
+            return False
+
+        written = not file_matches(file_name, sha256, len(content))
+        if written:
+            atomic_write(file_name, content)
+            self.n_written += 1
+        else:
+            self.n_skipped += 1
+
+        stat = os.stat(file_name)
+        self.entries[key] = {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        return written
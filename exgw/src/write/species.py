@@ -1,6 +1,27 @@
 """ Write data to species file.
 """
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, TextIO
+
+import numpy as np
+
+
+# Size (in characters) of the chunks written by write_species_xml
+write_buffer_size = 64 * 1024
+
+# Decimal places of trial energies written by high_energy_los_string
+trial_energy_precision = 8
+
+# Pair of high-energy LOs per linearisation energy, following serialised_local_orbitals.
+# l is substituted once per l-channel, leaving four trial energies per pair.
+high_energy_lo_template = """      <lo l="{l}">
+       <wf matchingOrder="0" trialEnergy="%s" searchE="false"/>
+       <wf matchingOrder="1" trialEnergy="%s" searchE="false"/>
+      </lo>
+      <lo l="{l}">
+       <wf matchingOrder="1" trialEnergy="%s" searchE="false"/>
+       <wf matchingOrder="2" trialEnergy="%s" searchE="false"/>
+      </lo>
+"""
 
 
 def write_species_file_from_dict(species_dict: dict, file_name: Optional[str] = None):
@@ -9,11 +30,37 @@ def write_species_file_from_dict(species_dict: dict, file_name: Optional[str] =
     :param species_dict: Serialised species data.
     :param file_name: Optional file name.
     """
-    species_str = species_xml_str_from_dict(species_dict)
     if file_name is None:
         file_name = species_dict['species']['chemicalSymbol'].capitalize() + '.xml'
     with open(file_name, "w") as fid:
-        fid.write(species_str)
+        write_species_xml(species_dict, fid)
+
+
+def write_species_xml(species: dict, stream: TextIO, buffer_size: Optional[int] = None,
+                      lo_energies: Optional[Dict[int, np.ndarray]] = None):
+    """ Write species data in dict form to a text stream, as XML.
+
+    Fragments of the species file are buffered, and written in chunks of at least buffer_size
+    characters, such that the full file is never held in memory. The output is identical
+    to species_xml_str_from_dict.
+
+    :param species: Serialised species data.
+    :param stream: Text stream, for example an open file or io.StringIO.
+    :param buffer_size: Optional chunk size, in characters. Defaults to write_buffer_size.
+    :param lo_energies: Optional linearisation energies of high-energy LOs to append, per l-channel.
+    See species_xml_fragments.
+    """
+    buffer_size = write_buffer_size if buffer_size is None else buffer_size
+    buffer = []
+    buffered = 0
+    for fragment in species_xml_fragments(species, lo_energies):
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered >= buffer_size:
+            stream.write(''.join(buffer))
+            buffer.clear()
+            buffered = 0
+    stream.write(''.join(buffer))
 
 
 def species_xml_str_from_dict(species: dict) -> str:
@@ -23,8 +70,23 @@ def species_xml_str_from_dict(species: dict) -> str:
     :param species: Serialised species data.
     :return species_str: XML-formatted species file string.
     """
+    return ''.join(species_xml_fragments(species))
+
+
+def species_xml_fragments(species: dict, lo_energies: Optional[Dict[int, np.ndarray]] = None) -> Iterator[str]:
+    """ Given species data in dict form (as returned by parse_species_xml), yield
+    the XML-formatted species file in fragments.
+
+    High-energy LOs can be passed as linearisation energies rather than serialised LOs,
+    in which case each l-channel is formatted in one batch, by high_energy_los_string.
+
+    :param species: Serialised species data.
+    :param lo_energies: Optional linearisation energies of high-energy LOs to append, per l-channel.
+    Equivalent to appending serialised_local_orbitals(l, lo_energies[l]) to the LOs of channel l.
+    :return: Iterator over fragments of the XML-formatted species file string.
+    """
     # Header
-    species_str = """<?xml version="1.0" encoding="UTF-8"?>
+    yield """<?xml version="1.0" encoding="UTF-8"?>
 <spdb xsi:noNamespaceSchemaLocation="../../xml/species.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
     """
 
@@ -33,17 +95,17 @@ def species_xml_str_from_dict(species: dict) -> str:
     name = species['species']['name']
     z = species['species']['z']
     mass = species['species']['mass']
-    species_str += f'<sp chemicalSymbol="{chemicalSymbol}" name="{name}" z="{z}" mass="{mass}">\n'
+    yield f'<sp chemicalSymbol="{chemicalSymbol}" name="{name}" z="{z}" mass="{mass}">\n'
 
     # Muffin tin
     rmin = species['muffin_tin']['rmin']
     radius = species['muffin_tin']['radius']
     rinf = species['muffin_tin']['rinf']
     radialmeshPoints = species['muffin_tin']['radialmeshPoints']
-    species_str += f'    <muffinTin rmin="{rmin}" radius="{radius}" rinf="{rinf}" radialmeshPoints="{radialmeshPoints}"/>\n'
+    yield f'    <muffinTin rmin="{rmin}" radius="{radius}" rinf="{rinf}" radialmeshPoints="{radialmeshPoints}"/>\n'
 
     # Atomic states
-    species_str += atomic_states_string(species['atomic_states'])
+    yield atomic_states_string(species['atomic_states'])
 
     l_values = [lapw['l'] for lapw in species['basis']['custom']]
     l_max = max(l_values)
@@ -55,27 +117,28 @@ def species_xml_str_from_dict(species: dict) -> str:
         l = lo['l']
         los_by_lvalue[l].append(lo)
 
-    species_str += "    <basis>\n "
+    yield "    <basis>\n "
 
     # Default l(apw) line
     type = species['basis']['default'][0]['type']
     trial_energy = species['basis']['default'][0]['trialEnergy']
     search_e = species['basis']['default'][0]['searchE']
-    species_str += f'      <default type="{type}" trialEnergy="{trial_energy}" searchE="{search_e}"/> \n\n'
+    yield f'      <default type="{type}" trialEnergy="{trial_energy}" searchE="{search_e}"/> \n\n'
 
     # lapw and any explicit local orbitals, per l-channel
     # Note, there should only be one l(apw) per l-channel
-    # print(species['basis']['custom'])
     for l in range(0, l_max + 1):
-        species_str += function_string(species['basis']['custom'][l])
-        species_str += local_orbitals_string(los_by_lvalue[l])
-
-    species_str += """    </basis>
+        yield function_string(species['basis']['custom'][l])
+        for lo in los_by_lvalue[l]:
+            yield local_orbital_string(lo)
+        if lo_energies is not None and l in lo_energies:
+            yield high_energy_los_string(l, lo_energies[l])
+        yield '\n'
+
+    yield """    </basis>
   </sp>
 </spdb>"""
 
-    return species_str
-
 
 def local_orbitals_string(los_l: List[dict]) -> str:
     """ Convert serialised local orbital data to string.
@@ -131,6 +194,35 @@ def local_orbital_string(lo: dict) -> str:
     return string
 
 
+def high_energy_los_string(l: int, energies: np.ndarray, precision: Optional[int] = None) -> str:
+    """ Format the high-energy LOs of an l-channel, given their linearisation energies.
+
+    Fast path for LOs following the fixed pattern of serialised_local_orbitals: energies are
+    formatted at a fixed precision in one call, and substituted into a repeated template in
+    another, rather than formatting each radial function separately. For example, given
+    l = 3 and energies = [3.6155], return:
+
+      <lo l="3">
+       <wf matchingOrder="0" trialEnergy="3.61550000" searchE="false"/>
+       <wf matchingOrder="1" trialEnergy="3.61550000" searchE="false"/>
+      </lo>
+      <lo l="3">
+       <wf matchingOrder="1" trialEnergy="3.61550000" searchE="false"/>
+       <wf matchingOrder="2" trialEnergy="3.61550000" searchE="false"/>
+      </lo>
+
+    :param l: l-channel.
+    :param energies: Linearisation energies, one per pair of LOs.
+    :param precision: Optional decimal places of trial energies. Defaults to trial_energy_precision.
+    :return: XML-formatted local orbitals string.
+    """
+    precision = trial_energy_precision if precision is None else precision
+    energies = np.asarray(energies, dtype=float).ravel()
+    formatted = np.char.mod(f'%.{precision}f', energies)
+    template = high_energy_lo_template.replace('{l}', str(l))
+    return (template * energies.size) % tuple(np.repeat(formatted, 4).tolist())
+
+
 def function_string(function: dict):
     """ Convert lapw serialised data into an XML string.
 
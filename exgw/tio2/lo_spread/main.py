@@ -3,13 +3,16 @@
 # External libs
 import os.path
 from pathlib import Path
-import shutil
-from typing import List
+from typing import List, Optional
 
 # This package
+from exgw.src.basis.linear_dependence import screen_linear_dependence
 from exgw.src.inputs.gw import GWInput
 from exgw.src.parse.parsers import parse_lorecommendations, parse_species_xml
-from exgw.src.write.species import write_species_file_from_dict
+from exgw.src.write.content_store import ContentStore
+from exgw.src.write.fan_out import fan_out_file
+from exgw.src.write.incremental import WriteManifest
+from exgw.src.write.species import species_xml_str_from_dict
 
 # TiO2 specific
 from exgw.tio2.lo_spread.ground_state_xml import converged_input_xml
@@ -41,7 +44,23 @@ def set_input() -> str:
     return input_xml
 
 
-def main(root: str, ground_state_path: str, input_xml: str, calculations: List[Calculation]):
+def check_linear_dependence(calculations: List[Calculation], tolerance: float = 1.e-2):
+    """ Check no basis contains near-equivalent LOs, before writing any calculation.
+
+    :param calculations: Calculations to check.
+    :param tolerance: Trial energies closer than tolerance (in Ha) are considered equivalent.
+    """
+    for calculation in calculations:
+        for x, basis in calculation.basis.items():
+            _, pairs = screen_linear_dependence(basis, tolerance)
+            for l, channel_pairs in pairs.items():
+                if channel_pairs:
+                    raise ValueError(f'{calculation.directory}, {x}: near-equivalent LOs {channel_pairs} '
+                                     f'in l={l}, which may cause linear dependence')
+
+
+def main(root: str, ground_state_path: str, input_xml: str, calculations: List[Calculation],
+         link: Optional[str] = None, state_strategy: str = 'reflink'):
     """ Main for running TiO2
 
     Idea is to define the root, ground_state_path, input.xml and a list of calculation settings, then inject
@@ -49,29 +68,49 @@ def main(root: str, ground_state_path: str, input_xml: str, calculations: List[C
 
     Need some way of producing directory paths so I can easily load when I want to do post-processing?
     - Should just be `full_directory` from above. All settings in calculations
+
+    Input files are only written if their content changed since the last run, as recorded in
+    a manifest under root. See WriteManifest.
+
+    If link is given, input files are instead written once per unique content to a store
+    under root, and linked into each run directory. See ContentStore.
+
+    STATE.OUT is placed in each run directory with the first strategy supported by the
+    filesystem, starting from state_strategy. See fan_out_file.
+
+    :param link: Optional link type for deduplicated input files, 'hardlink' or 'symlink'.
+    :param state_strategy: Preferred strategy for placing the ground state STATE.OUT in each run directory.
     """
     osjp = os.path.join
 
+    check_linear_dependence(calculations)
+    writer = WriteManifest(root) if link is None else ContentStore(root, link)
+    state_bytes = 0
+
     for calculation in calculations:
         # Create run directory
         full_directory = osjp(root, calculation.directory)
         Path(full_directory).mkdir(parents=True, exist_ok=True)
 
-        # Copy STATE.OUT from the ground state
-        shutil.copyfile(osjp(ground_state_path, "STATE.OUT"), osjp(full_directory, "STATE.OUT"))
+        # STATE.OUT from the ground state
+        result = fan_out_file(osjp(ground_state_path, "STATE.OUT"), osjp(full_directory, "STATE.OUT"), state_strategy)
+        state_bytes += result.bytes_written
 
         # Input xml
-        with open(osjp(full_directory, "input.xml"), "w") as fid:
-            fid.write(input_xml)
+        writer.write(osjp(full_directory, "input.xml"), input_xml)
 
         # Species files
         for x in ['ti', 'o']:
             file_name = osjp(full_directory, x.capitalize() + '.xml')
-            write_species_file_from_dict(calculation.basis[x], file_name=file_name)
+            writer.write(file_name, species_xml_str_from_dict(calculation.basis[x]))
 
         # Run script
-        with open(osjp(full_directory, "run.sh"), "w") as fid:
-            fid.write(calculation.run_script)
+        writer.write(osjp(full_directory, "run.sh"), calculation.run_script)
+
+    if link is None:
+        writer.save()
+    print(f'Wrote {writer.n_written} input files, {writer.n_skipped} unchanged')
+    print(f'Wrote {state_bytes} bytes of STATE.OUT')
 
 
 if __name__ == "__main__":
@@ -81,7 +120,10 @@ if __name__ == "__main__":
     default_basis = {}
     default_basis['ti'] = parse_species_xml(os.path.join(ground_state_path, "Ti.xml"))
     default_basis['o'] = parse_species_xml(os.path.join(ground_state_path, "O.xml"))
-    lo_recommendations = parse_lorecommendations(os.path.join(ground_state_path, "lorecommendations.dat"), ['ti', 'o'], l_max=7, node_max=20)
+    # Cache under the sweep root, as the ground state directory may be shared or read-only
+    lo_recommendations = parse_lorecommendations(os.path.join(ground_state_path, "lorecommendations.dat"), ['ti', 'o'],
+                                                 l_max=7, node_max=20, cache=True,
+                                                 cache_dir=os.path.join(root, '.cache'))
 
     input_xml = set_input()
     calculations = [calc_lmax43_locut20(default_basis, lo_recommendations),
@@ -0,0 +1,51 @@
+""" Test basis size and cost estimates
+"""
+import numpy as np
+import pytest
+
+from exgw.src.basis.basis_size import estimate_basis_size, lo_functions_per_atom, n_plane_waves, relative_cost
+
+
+def basis_with_los(n_los: list) -> dict:
+    los = [{'l': l, 'matchingOrder': [0, 1], 'trialEnergy': [1.0, 1.0], 'searchE': [False, False]}
+           for l, n in enumerate(n_los) for _ in range(n)]
+    return {'basis': {'default': [], 'custom': [], 'lo': los}}
+
+
+def test_lo_functions_per_atom():
+    basis_ti = basis_with_los([4, 2, 2, 2, 2, 2])
+    assert lo_functions_per_atom(basis_ti) == 4 * 1 + 2 * 3 + 2 * 5 + 2 * 7 + 2 * 9 + 2 * 11
+    assert lo_functions_per_atom(basis_ti, l_max=1) == 4 * 1 + 2 * 3
+    assert lo_functions_per_atom(basis_with_los([])) == 0
+
+
+def test_estimate_basis_size():
+    bases = {'ti': basis_with_los([4, 2, 2]), 'o': basis_with_los([2, 2])}
+    n_atoms = {'ti': 2, 'o': 4}
+
+    size = estimate_basis_size(bases, n_atoms, n_pw=100)
+    assert size['n_los'] == {'ti': [4, 2, 2], 'o': [2, 2]}
+    assert size['n_lo_functions'] == 2 * (4 + 6 + 10) + 4 * (2 + 6)
+    assert size['dimension'] == 100 + 72
+    assert size['hamiltonian_elements'] == 172 ** 2
+
+    reference = estimate_basis_size({'ti': basis_with_los([2, 1, 1]), 'o': basis_with_los([1, 1])}, n_atoms, n_pw=100)
+    cost = relative_cost(size, reference)
+    ratio = size['dimension'] / reference['dimension']
+    assert np.isclose(cost['hamiltonian_memory'], ratio ** 2)
+    assert np.isclose(cost['diagonalisation_time'], ratio ** 3)
+
+    # Relative costs of LO-only dimensions are meaningless
+    with pytest.raises(ValueError, match='n_pw'):
+        relative_cost(estimate_basis_size(bases, n_atoms), reference)
+
+    # Species without LOs contribute plane waves only
+    size = estimate_basis_size({'ti': basis_with_los([4, 2, 2]), 'o': basis_with_los([])}, n_atoms, n_pw=100)
+    assert size['n_los'] == {'ti': [4, 2, 2], 'o': [0]}
+    assert size['dimension'] == 100 + 2 * (4 + 6 + 10)
+
+
+def test_n_plane_waves():
+    # Rutile TiO2 with rgkmax = 8 and RMT(O) = 1.5
+    volume = 8.680645 ** 2 * 5.59111663805
+    assert n_plane_waves(volume, rgkmax=8.0, rmt_min=1.5) == int(round(volume * (8.0 / 1.5) ** 3 / (6 * np.pi ** 2)))
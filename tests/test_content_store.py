@@ -0,0 +1,54 @@
+""" Test the content-addressed store
+"""
+import os
+
+import pytest
+
+from exgw.src.write.content_store import ContentStore
+
+
+@pytest.mark.parametrize('link', ['hardlink', 'symlink'])
+def test_content_store(tmpdir, link):
+    root = str(tmpdir)
+    directories = [os.path.join(root, f'lmax4_locut{cutoff}') for cutoff in [20, 30, 40]]
+    for directory in directories:
+        os.makedirs(directory)
+
+    store = ContentStore(root, link)
+    for directory in directories:
+        assert store.write(os.path.join(directory, 'input.xml'), '<input/>')
+        assert store.write(os.path.join(directory, 'O.xml'), b'<spdb/>')
+    assert (store.n_written, store.n_linked, store.n_skipped) == (2, 6, 0)
+
+    # Each unique file is stored once, and shared by all directories
+    input_files = [os.path.join(directory, 'input.xml') for directory in directories]
+    for file_name in input_files:
+        with open(file_name) as fid:
+            assert fid.read() == '<input/>'
+        assert os.path.samefile(file_name, input_files[0])
+        assert os.path.islink(file_name) == (link == 'symlink')
+
+    # Unchanged links are not recreated
+    assert not store.write(input_files[0], '<input/>')
+    assert store.n_skipped == 1
+
+    # Changed content is linked to a new store file, leaving the other directories unchanged
+    assert store.write(input_files[0], '<input gw="true"/>')
+    with open(input_files[0]) as fid:
+        assert fid.read() == '<input gw="true"/>'
+    with open(input_files[1]) as fid:
+        assert fid.read() == '<input/>'
+    assert store.n_written == 3
+
+
+def test_content_store_replaces_files(tmpdir):
+    file_name = str(tmpdir / 'run.sh')
+    with open(file_name, 'w') as fid:
+        fid.write('#!/bin/bash')
+
+    store = ContentStore(str(tmpdir))
+    assert store.write(file_name, '#!/bin/bash')
+    assert os.stat(file_name).st_nlink == 2
+
+    with pytest.raises(ValueError):
+        ContentStore(str(tmpdir), link='copy')
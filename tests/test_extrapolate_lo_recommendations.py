@@ -0,0 +1,56 @@
+""" Test extrapolation of LO recommendations
+"""
+import numpy as np
+import pytest
+
+from exgw.src.basis.extrapolate_lo_recommendations import extrapolate_lo_recommendations, \
+    extrapolation_error, fit_recommendation_growth
+from exgw.src.basis.optimised_basis import filter_highest_lo_recommendations
+
+
+def spherical_well_energies(l_max: int, node_max: int, r_mt: float = 2.0) -> np.ndarray:
+    """ Asymptotic energies of a particle in a spherical well, E(n) = (pi (n + l/2 + 1) / R)^2 / 2
+    """
+    l, n = np.meshgrid(np.arange(0, l_max + 1), np.arange(0, node_max + 1), indexing='ij')
+    return 0.5 * (np.pi * (n + 0.5 * l + 1) / r_mt) ** 2
+
+
+def test_extrapolate_lo_recommendations():
+    reference = spherical_well_energies(l_max=3, node_max=30)
+    recommendations = reference[:, :21]
+
+    energies, extrapolated = extrapolate_lo_recommendations(recommendations, node_max=30)
+    assert energies.shape == (4, 31)
+    assert not extrapolated[:, :21].any()
+    assert extrapolated[:, 21:].all()
+    assert np.array_equal(energies[:, :21], recommendations)
+    assert np.allclose(energies, reference)
+
+    error = extrapolation_error(energies, extrapolated, reference)
+    assert np.isnan(error[:, :21]).all()
+    assert np.allclose(error[:, 21:], 0.0)
+
+    # Extended to cover the largest cutoff
+    lo_cutoff = {0: 100., 2: 2000.}
+    energies, extrapolated = extrapolate_lo_recommendations(recommendations, lo_cutoff=lo_cutoff)
+    assert energies[2, -1] >= 2000.
+    assert energies[2, -2] < 2000.
+    assert (np.diff(energies, axis=1) > 0).all()
+    last_indices = filter_highest_lo_recommendations(lo_cutoff, energies)
+    assert last_indices[2] == energies.shape[1] - 1
+
+    # Never truncated
+    energies, extrapolated = extrapolate_lo_recommendations(recommendations, node_max=10)
+    assert np.array_equal(energies, recommendations)
+    assert not extrapolated.any()
+
+
+def test_fit_recommendation_growth():
+    recommendations = spherical_well_energies(l_max=1, node_max=20)
+    recommendations[1, -6:] = recommendations[1, -6:][::-1]
+
+    with pytest.raises(ValueError, match='For l=1, the LO recommendations do not grow'):
+        fit_recommendation_growth(recommendations)
+
+    with pytest.raises(ValueError):
+        fit_recommendation_growth(recommendations, n_fit=2)
@@ -0,0 +1,77 @@
+""" Test fan-out of a file to many directories
+"""
+import glob
+import os
+
+import pytest
+
+from exgw.src.write import fan_out as fan_out_module
+from exgw.src.write.fan_out import fan_out, fan_out_file
+
+
+@pytest.fixture
+def state_file(tmpdir):
+    file_name = str(tmpdir / "STATE.OUT")
+    with open(file_name, 'wb') as fid:
+        fid.write(os.urandom(100000))
+    return file_name
+
+
+@pytest.mark.parametrize('strategy', ['hardlink', 'symlink', 'reflink', 'copy_file_range', 'copy'])
+def test_fan_out(tmpdir, state_file, strategy):
+    destinations = []
+    for cutoff in [20, 30, 40]:
+        directory = tmpdir / f'lmax4_locut{cutoff}'
+        directory.mkdir()
+        destinations.append(str(directory / "STATE.OUT"))
+
+    results = fan_out(state_file, destinations, strategy)
+    assert [result.destination for result in results] == destinations
+
+    with open(state_file, 'rb') as fid:
+        state = fid.read()
+    for result in results:
+        assert result.strategy in fan_out_module.fan_out_fallbacks[strategy]
+        assert result.bytes_written == (len(state) if result.strategy in ['copy_file_range', 'copy'] else 0)
+        with open(result.destination, 'rb') as fid:
+            assert fid.read() == state
+        assert not glob.glob(result.destination + '.*.tmp')
+
+    # Destinations are current, hence left untouched
+    results = fan_out(state_file, destinations, strategy)
+    assert all(result.strategy == 'unchanged' and result.bytes_written == 0 for result in results)
+
+
+def test_fan_out_fallback(tmpdir, state_file, monkeypatch):
+    def not_supported(source, destination):
+        raise OSError('Not supported')
+
+    monkeypatch.setitem(fan_out_module.fan_out_functions, 'hardlink', not_supported)
+    monkeypatch.setitem(fan_out_module.fan_out_functions, 'reflink', not_supported)
+
+    result = fan_out_file(state_file, str(tmpdir / "STATE_copy.OUT"), 'hardlink')
+    assert result.strategy == 'copy_file_range'
+    assert result.bytes_written == os.stat(state_file).st_size
+
+    with pytest.raises(ValueError):
+        fan_out_file(state_file, str(tmpdir / "STATE_copy.OUT"), 'rsync')
+
+
+def test_fan_out_short_kernel_copy(tmpdir, state_file, monkeypatch):
+    """ A kernel copy that stops before the end of the source falls back to a full copy.
+    """
+    def short_copy(src, dst, count, *args):
+        return 0
+
+    monkeypatch.setattr(os, 'copy_file_range', short_copy, raising=False)
+
+    destination = str(tmpdir / "STATE_copy.OUT")
+    with pytest.raises(OSError):
+        fan_out_module.kernel_copy(state_file, destination)
+
+    result = fan_out_file(state_file, destination, 'copy_file_range')
+    assert result.strategy == 'copy'
+    assert result.bytes_written == os.stat(state_file).st_size
+    with open(state_file, 'rb') as src, open(destination, 'rb') as dst:
+        assert dst.read() == src.read()
+    assert not glob.glob(destination + '.*.tmp')
@@ -0,0 +1,83 @@
+""" Test skip-if-unchanged writing
+"""
+import glob
+import json
+import os
+
+import pytest
+
+from exgw.src.write import incremental
+from exgw.src.write.incremental import WriteManifest, replace_atomically, write_if_changed
+
+
+def test_write_if_changed(tmpdir):
+    file_name = str(tmpdir / "input.xml")
+
+    assert write_if_changed(file_name, '<input/>')
+    mtime_ns = os.stat(file_name).st_mtime_ns
+    assert not write_if_changed(file_name, '<input/>')
+    assert os.stat(file_name).st_mtime_ns == mtime_ns
+
+    assert write_if_changed(file_name, b'<input></input>')
+    with open(file_name) as fid:
+        assert fid.read() == '<input></input>'
+    assert not glob.glob(file_name + '.*.tmp')
+
+
+def test_replace_atomically(tmpdir):
+    file_name = str(tmpdir / "input.xml")
+    write_if_changed(file_name, '<input/>')
+
+    # Concurrent writers of the same file get different temporary files
+    with replace_atomically(file_name) as tmp_file, replace_atomically(file_name) as other_tmp_file:
+        assert tmp_file != other_tmp_file
+        assert os.path.dirname(tmp_file) == str(tmpdir)
+        for name in [tmp_file, other_tmp_file]:
+            with open(name, 'w') as fid:
+                fid.write(name)
+    with open(file_name) as fid:
+        assert fid.read() == tmp_file
+
+    # Failures remove the temporary file, and leave the file untouched
+    with pytest.raises(RuntimeError):
+        with replace_atomically(file_name) as tmp_file:
+            with open(tmp_file, 'w') as fid:
+                fid.write('<partial')
+            raise RuntimeError('Interrupted write')
+    assert os.listdir(str(tmpdir)) == ["input.xml"]
+    with open(file_name) as fid:
+        assert fid.read() != '<partial'
+
+
+def test_write_manifest(tmpdir, monkeypatch):
+    root = str(tmpdir)
+    os.makedirs(os.path.join(root, 'lmax4_locut20'))
+    files = {os.path.join(root, 'lmax4_locut20', name): f'<{name}/>' for name in ['input.xml', 'Ti.xml', 'run.sh']}
+
+    manifest = WriteManifest(root)
+    assert all(manifest.write(file_name, content) for file_name, content in files.items())
+    manifest.save()
+    with open(os.path.join(root, '.write_manifest.json')) as fid:
+        assert set(json.load(fid)['entries']) == {os.path.join('lmax4_locut20', name)
+                                                  for name in ['input.xml', 'Ti.xml', 'run.sh']}
+
+    # Unchanged files are identified from the manifest, without being read or written
+    reads = []
+    monkeypatch.setattr(incremental, 'file_matches', lambda *args: reads.append(args) or False)
+    manifest = WriteManifest(root)
+    assert not any(manifest.write(file_name, content) for file_name, content in files.items())
+    assert reads == []
+    assert (manifest.n_written, manifest.n_skipped) == (0, 3)
+    monkeypatch.undo()
+
+    # Modified since written
+    input_file = os.path.join(root, 'lmax4_locut20', 'input.xml')
+    with open(input_file, 'w') as fid:
+        fid.write('<edited/>')
+    manifest = WriteManifest(root)
+    assert manifest.write(input_file, '<input.xml/>')
+
+    # Changed content
+    assert manifest.write(input_file, '<input gw="true"/>')
+    with open(input_file) as fid:
+        assert fid.read() == '<input gw="true"/>'
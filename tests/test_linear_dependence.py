@@ -0,0 +1,50 @@
+""" Test screening of LOs for linear dependence
+"""
+from exgw.src.basis.linear_dependence import near_equivalent_lo_pairs, screen_linear_dependence
+
+
+def lo(l: int, matching_order: list, energy: float) -> dict:
+    return {'l': l, 'matchingOrder': matching_order, 'trialEnergy': [energy] * len(matching_order),
+            'searchE': [False] * len(matching_order)}
+
+
+los = [lo(0, [0, 1], -4.378),
+       lo(0, [1, 2], -4.378),
+       lo(0, [0, 1], 12.917),
+       lo(0, [0, 1], 12.920),
+       lo(0, [0, 1], 12.9175),
+       lo(1, [0, 1], 4.050),
+       lo(1, [0, 1], 4.200),
+       lo(2, [0, 1], 0.0)]
+
+
+def test_near_equivalent_lo_pairs():
+    pairs = near_equivalent_lo_pairs(los, tolerance=1.e-2)
+
+    assert set(pairs) == {0, 1, 2}, "Every l-channel is reported"
+    assert pairs[0] == [(2, 3), (2, 4), (3, 4)], "Same energies with different matching orders are not equivalent"
+    assert pairs[1] == []
+    assert pairs[2] == []
+
+    pairs = near_equivalent_lo_pairs(los, tolerance=1.e-3)
+    assert pairs[0] == [(2, 4)]
+
+    pairs = near_equivalent_lo_pairs(los, tolerance=0.2)
+    assert pairs[1] == [(5, 6)]
+
+
+def test_screen_linear_dependence():
+    basis = {'species': {'chemicalSymbol': 'Ti'}, 'basis': {'default': [], 'custom': [], 'lo': los}}
+
+    flagged, pairs = screen_linear_dependence(basis, tolerance=1.e-2)
+    assert flagged is basis, "Only flag by default"
+    assert pairs[0] == [(2, 3), (2, 4), (3, 4)]
+
+    screened, pairs = screen_linear_dependence(basis, tolerance=1.e-2, drop=True)
+    assert screened['basis']['lo'] == [los[i] for i in [0, 1, 2, 5, 6, 7]]
+    assert screened['species'] is basis['species']
+    assert len(basis['basis']['lo']) == 8, "Input basis is not modified"
+
+    screened_again, pairs = screen_linear_dependence(screened, tolerance=1.e-2, drop=True)
+    assert not any(pairs.values())
+    assert screened_again is screened
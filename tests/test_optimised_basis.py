@@ -1,10 +1,16 @@
 import numpy as np
+import pytest
 
 from exgw.src.parse.parsers import parse_species_xml, parse_lorecommendations
 
-from exgw.src.basis.optimised_basis import construct_optimised_basis, maximum_pqn_per_valence_orbital, \
-    filter_lowest_lo_recommendations, filter_highest_lo_recommendations, max_nodes_per_valence_orbital, \
-    max_nodes_per_conduction_orbital, max_nodes_per_orbital_channel, n_radial_nodes
+from exgw.src.basis import optimised_basis
+from exgw.src.basis.basis_ladder import BasisLadder
+from exgw.src.basis.compact_basis import CompactSpecies
+from exgw.src.basis.optimised_basis import construct_optimised_basis, construct_optimised_bases, \
+    maximum_pqn_per_valence_orbital, filter_lowest_lo_recommendations, select_lo_windows, lo_cutoff_array, \
+    los_per_channel, filter_highest_lo_recommendations, max_nodes_per_valence_orbital, \
+    max_nodes_per_conduction_orbital, max_nodes_per_orbital_channel, n_radial_nodes, \
+    compute_max_nodes_per_orbital_channel
 
 
 def test_maximum_valence_per_orbital():
@@ -93,6 +99,64 @@ def test_max_nodes_per_orbital_channel():
     assert max_nodes == {0: 3, 1: 1, 2: 0, 3: 0, 4: 0, 5: 0}
 
 
+def test_compute_max_nodes_per_channel():
+    basis_ti = parse_species_xml(species_str)
+    compact_ti = CompactSpecies.from_dict(basis_ti)
+
+    assert optimised_basis.max_nodes_per_valence_channel(compact_ti.atomic_states) == \
+           max_nodes_per_valence_orbital(basis_ti['atomic_states'])
+    assert optimised_basis.max_nodes_per_conduction_channel(compact_ti.lo) == \
+           max_nodes_per_conduction_orbital(basis_ti['basis']['lo'])
+    assert optimised_basis.compute_max_nodes_per_channel(compact_ti) == {0: 3, 1: 1, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    # Conduction LOs with fewer nodes than the valence state of the same channel
+    conflict = CompactSpecies.from_dict(basis_ti)
+    conflict.lo = conflict.lo.copy()
+    conflict.lo['trialEnergy'][conflict.lo['l'] == 1] = 0.5
+    with pytest.raises(ValueError, match='l=1'):
+        optimised_basis.compute_max_nodes_per_channel(conflict)
+    with pytest.raises(ValueError, match='l=1'):
+        compute_max_nodes_per_orbital_channel(conflict.to_dict())
+
+    # An l-channel without LOs, below the largest l of the LOs
+    los_without_l2 = [lo for lo in basis_ti['basis']['lo'] if lo['l'] != 2]
+    with pytest.raises(ValueError):
+        max_nodes_per_conduction_orbital(los_without_l2)
+    compact_los = CompactSpecies.from_dict({**basis_ti, 'basis': {**basis_ti['basis'], 'lo': los_without_l2}}).lo
+    with pytest.raises(ValueError, match=r'l-channels \[2\]'):
+        optimised_basis.max_nodes_per_conduction_channel(compact_los)
+
+
+def test_max_nodes_per_orbital_channel_cache(monkeypatch):
+    optimised_basis.clear_node_cache()
+    monkeypatch.setattr(optimised_basis, 'node_cache_size', 2)
+
+    calls = []
+    compute = optimised_basis.compute_max_nodes_per_orbital_channel
+    monkeypatch.setattr(optimised_basis, 'compute_max_nodes_per_orbital_channel',
+                        lambda species: calls.append(1) or compute(species))
+
+    basis_ti = parse_species_xml(species_str)
+    max_nodes = max_nodes_per_orbital_channel(basis_ti)
+    assert max_nodes_per_orbital_channel(basis_ti) == max_nodes
+    assert max_nodes_per_orbital_channel(parse_species_xml(species_str)) == max_nodes
+    assert len(calls) == 1, "Species with the same content share the cached analysis"
+
+    # Mutating the result does not corrupt the cache
+    max_nodes[0] = 100
+    assert max_nodes_per_orbital_channel(basis_ti)[0] == 3
+
+    # Least-recently used entries are evicted
+    for n in [5, 6]:
+        basis = parse_species_xml(species_str.replace('<atomicState n="4" l="0"', f'<atomicState n="{n}" l="0"'))
+        max_nodes_per_orbital_channel(basis)
+    assert len(calls) == 3
+    max_nodes_per_orbital_channel(basis_ti)
+    assert len(calls) == 4
+
+    optimised_basis.clear_node_cache()
+
+
 def test_filter_lowest_lo_recommendations():
     # From (n_nodes + l + 1), LOs present in basis = 4s 3p 3d 4f 5g 6h
     max_nodes = {0: 3,
@@ -158,6 +222,44 @@ def test_filter_highest_lo_recommendations(tmpdir):
                                               "so do not use the index"
 
 
+def test_filter_highest_lo_recommendations_batched(tmpdir):
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+
+    lo_cutoffs = [{0: 150}, {0: 150, 1: 120, 2: 80}, {}]
+    indices = filter_highest_lo_recommendations(lo_cutoffs, recommendations_ti)
+    assert indices.shape == (3, 8)
+
+    for i, lo_cutoff in enumerate(lo_cutoffs):
+        assert (indices[i] == filter_highest_lo_recommendations(lo_cutoff, recommendations_ti)).all()
+        for l in range(0, 8):
+            expected = np.count_nonzero(recommendations_ti[l, :] <= lo_cutoff.get(l, -np.inf))
+            assert indices[i, l] == expected
+
+    cutoffs = lo_cutoff_array(lo_cutoffs, 7)
+    assert cutoffs.shape == (3, 8)
+    assert cutoffs[1, 2] == 80
+    assert cutoffs[0, 1] == -np.inf, "Undefined cutoffs add no LOs"
+
+
+def test_select_lo_windows(tmpdir):
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+    max_nodes = {0: 3, 1: 1, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    first, last = select_lo_windows(max_nodes, {0: 150, 1: 120, 2: 80}, recommendations_ti)
+    assert (first == [4, 2, 1, 1, 1, 1, 0, 0]).all(), "Padded to l_max of the recommendations"
+    assert (last == [11, 9, 7, 0, 0, 0, 0, 0]).all()
+
+    first, last = select_lo_windows(max_nodes, [{0: 150}, {0: 20, 1: 20}], recommendations_ti)
+    assert last.shape == (2, 8)
+
+    with pytest.raises(ValueError, match='For l=1, 3'):
+        select_lo_windows(max_nodes, [{1: 10000}, {0: 20, 3: 10000}], recommendations_ti)
+
+
 def test_construct_optimised_basis(tmpdir):
     """ Construct an optimised basis for Ti (from TiO2).
     """
@@ -277,6 +379,137 @@ def test_construct_optimised_basis(tmpdir):
 
     assert optimised_basis['basis']['lo'] == reference
 
+    # Precomputed node analysis
+    max_nodes = max_nodes_per_orbital_channel(default_basis_ti)
+    assert construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, energy_cutoff_ti,
+                                     max_nodes=max_nodes) == optimised_basis
+
+
+def test_construct_optimised_bases(tmpdir):
+    """ Test the batched construction gives the same bases as constructing one at a time.
+    """
+    default_basis_ti = parse_species_xml(species_str)
+
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+
+    l_max_values = [3, 4, 5]
+    lo_cutoffs = [{l: cutoff for l in range(0, 4)} for cutoff in [20, 30, 40, 50, 60, 70, 80, 90, 100]]
+    lo_cutoffs.append({0: 150, 1: 120, 2: 80})
+
+    bases = construct_optimised_bases(default_basis_ti, recommendations_ti, l_max_values, lo_cutoffs)
+    assert len(bases) == len(l_max_values)
+
+    for i, l_max in enumerate(l_max_values):
+        assert len(bases[i]) == len(lo_cutoffs)
+        for j, lo_cutoff in enumerate(lo_cutoffs):
+            reference = construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, lo_cutoff)
+            assert bases[i][j] == reference
+
+    with pytest.raises(ValueError):
+        construct_optimised_bases(default_basis_ti, recommendations_ti, [4], [{0: 10000}])
+
+
+def test_construct_optimised_basis_with_n_los(tmpdir):
+    default_basis_ti = parse_species_xml(species_str)
+
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+
+    l_max = 4
+    assert (los_per_channel(default_basis_ti['basis']['lo'], l_max) == [4, 2, 2, 2, 2]).all()
+
+    n_los = {0: 8, 1: 8, 2: 8, 3: 5}
+    basis = construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, n_los=n_los)
+    assert (los_per_channel(basis['basis']['lo'], l_max) == [8, 8, 8, 4, 2]).all(), \
+        "LOs are added in pairs, hence an odd target is rounded down"
+
+    # Same as the energy cutoff that includes the same recommendations
+    first_indices = [4, 2, 1, 1]
+    n_added = [2, 3, 3, 1]
+    lo_cutoff = {l: recommendations_ti[l, first_indices[l] + n_added[l] - 1] for l in range(0, 4)}
+    assert basis == construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, lo_cutoff)
+
+    n_los_batch = [n_los, {0: 4}, {0: 12, 2: 6}]
+    bases = construct_optimised_bases(default_basis_ti, recommendations_ti, [3, 4], n_los=n_los_batch)
+    for i, l_max in enumerate([3, 4]):
+        for j, n_los_j in enumerate(n_los_batch):
+            assert bases[i][j] == construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, n_los=n_los_j)
+
+    with pytest.raises(ValueError, match='number of LOs requested exceeds'):
+        construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, n_los={0: 100})
+
+    with pytest.raises(ValueError):
+        construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, lo_cutoff, n_los)
+
+    with pytest.raises(ValueError):
+        construct_optimised_basis(default_basis_ti, recommendations_ti, l_max)
+
+
+def test_optimised_bases_share_default_sections(tmpdir):
+    default_basis_ti = parse_species_xml(species_str)
+
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+
+    bases = construct_optimised_bases(default_basis_ti, recommendations_ti, [3, 4], [{0: 20}, {0: 30}])
+    basis_a, basis_b = bases[0][0], bases[1][1]
+
+    # Unchanged sections are shared, rather than copied
+    for key in ['species', 'muffin_tin', 'atomic_states']:
+        assert basis_a[key] is default_basis_ti[key]
+        assert basis_b[key] is default_basis_ti[key]
+    assert basis_a['basis']['default'] is default_basis_ti['basis']['default']
+
+    # Sections that vary per basis are not
+    assert basis_a['basis'] is not default_basis_ti['basis']
+    assert basis_a['basis']['custom'] is not basis_b['basis']['custom']
+    assert [lapw['l'] for lapw in basis_a['basis']['custom']] == [0, 1, 2, 3]
+    assert basis_a['basis']['lo'] is not basis_b['basis']['lo']
+
+    n_default_los = len(default_basis_ti['basis']['lo'])
+    basis_a['basis']['lo'].append({'l': 0, 'matchingOrder': [0], 'trialEnergy': [1.0], 'searchE': [False]})
+    assert len(default_basis_ti['basis']['lo']) == n_default_los
+
+
+def test_basis_ladder(tmpdir):
+    default_basis_ti = parse_species_xml(species_str)
+
+    lorec_file = tmpdir / "lorecommendations.txt"
+    lorec_file.write(lo_recommendations)
+    recommendations_ti = parse_lorecommendations(str(lorec_file), ['ti', 'o'])['ti']
+
+    l_max = 4
+    lo_cutoffs = [{l: cutoff for l in range(0, 4)} for cutoff in [20, 40, 60, 80, 100]]
+    ladder = BasisLadder(default_basis_ti, recommendations_ti, l_max, lo_cutoffs)
+    assert len(ladder) == len(lo_cutoffs)
+
+    # Every rung is equivalent to constructing the basis directly
+    for i, lo_cutoff in enumerate(lo_cutoffs):
+        basis = construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, lo_cutoff)
+        assert ladder.basis(i) == basis
+        assert (ladder.n_los(i) == los_per_channel(basis['basis']['lo'], l_max)).all()
+    assert ladder.n_los().shape == (len(lo_cutoffs), l_max + 1)
+
+    # Candidate LOs are stored once, and shared by all rungs
+    assert ladder.basis(0)['basis']['lo'][4] is ladder.basis(4)['basis']['lo'][4]
+
+    added_los = ladder.diff(1, 3)
+    for l in range(0, l_max + 1):
+        assert len(added_los[l]) == ladder.n_los(3)[l] - ladder.n_los(1)[l]
+        assert added_los[l] == ladder.channel_los(3, l)[ladder.n_los(1)[l]:]
+
+    with pytest.raises(ValueError, match='not a superset'):
+        ladder.diff(3, 1)
+
+    n_los = [{0: 6}, {0: 8, 1: 8}]
+    ladder = BasisLadder(default_basis_ti, recommendations_ti, l_max, n_los=n_los)
+    for i, n_los_i in enumerate(n_los):
+        assert ladder.basis(i) == construct_optimised_basis(default_basis_ti, recommendations_ti, l_max, n_los=n_los_i)
+
 
 # Mocked inputs
 
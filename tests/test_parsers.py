@@ -1,6 +1,10 @@
 """ Test parsers
 """
-from exgw.src.parse.parsers import parse_lorecommendations
+import numpy as np
+import pytest
+
+from exgw.src.parse.parsers import parse_lorecommendations, parse_lorecommendations_array, \
+    lorecommendations_array_from_string, LazyLORecommendations
 
 
 def test_parse_lorecommendations(tmpdir):
@@ -20,6 +24,125 @@ def test_parse_lorecommendations(tmpdir):
     assert recommendations['o'][7, 20] == 1115.85029887173
 
 
+def test_parse_lorecommendations_array(tmpdir):
+    file1 = tmpdir / "lorecommendations.txt"
+    file1.write(lo_recommendations)
+    energies = parse_lorecommendations_array(str(file1))
+
+    assert energies.shape == (2, 8, 21), "(n_species, l_max + 1, node_max + 1) determined from the file"
+    assert energies[0, 0, 0] == -667.991409275491
+    assert energies[1, 7, 20] == 1115.85029887173
+
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'])
+    assert np.array_equal(recommendations['zr'], energies[0])
+    assert np.array_equal(recommendations['o'], energies[1])
+
+
+def test_lorecommendations_container(tmpdir):
+    file1 = tmpdir / "lorecommendations.txt"
+    file1.write(lo_recommendations)
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'])
+
+    assert recommendations.energies.shape == (2, 8, 21)
+    assert (recommendations.l_max, recommendations.node_max) == (7, 20)
+    assert list(recommendations) == ['zr', 'o']
+    assert dict(recommendations).keys() == {'zr', 'o'}
+
+    zr = recommendations['zr']
+    assert zr.shape == (8, 21)
+    assert np.shares_memory(zr, recommendations.energies), "Per-species access returns a view"
+    assert np.shares_memory(recommendations['o'], recommendations.energies)
+    assert zr[7, 20] == recommendations.energies[recommendations.index('zr'), 7, 20]
+
+
+def test_parse_lorecommendations_inconsistent_dimensions(tmpdir):
+    file1 = tmpdir / "lorecommendations.txt"
+    file1.write(lo_recommendations)
+
+    with pytest.raises(ValueError):
+        parse_lorecommendations(str(file1), ['zr', 'o'], l_max=6, node_max=20)
+
+    with pytest.raises(ValueError):
+        parse_lorecommendations(str(file1), ['zr', 'o'], l_max=7, node_max=25)
+
+    with pytest.raises(ValueError):
+        parse_lorecommendations(str(file1), ['zr'])
+
+
+def test_parse_lorecommendations_with_cache(tmpdir):
+    file1 = tmpdir / "lorecommendations.txt"
+    file1.write(lo_recommendations)
+    cache_dir = tmpdir / "cache"
+
+    reference = parse_lorecommendations(str(file1), ['zr', 'o'])
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'], cache=True, cache_dir=str(cache_dir))
+    assert np.array_equal(recommendations.energies, reference.energies)
+    assert len(cache_dir.listdir()) == 1, "One cache file written"
+
+    # Second call is served from the memory-mapped cache
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'], cache=True, cache_dir=str(cache_dir))
+    assert isinstance(recommendations.energies, np.memmap)
+    assert np.array_equal(recommendations.energies, reference.energies)
+
+    # Changing the source invalidates the cache
+    file1.write(lo_recommendations.replace("-667.991409275491", "-667.000000000000"))
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'], cache=True, cache_dir=str(cache_dir))
+    assert recommendations['zr'][0, 0] == -667.0
+    assert len(cache_dir.listdir()) == 1, "Stale cache file removed"
+
+    # Sources with the same name, sharing a cache directory, keep their own caches
+    other_dir = tmpdir / "other"
+    other_dir.mkdir()
+    file2 = other_dir / "lorecommendations.txt"
+    file2.write(lo_recommendations)
+    parse_lorecommendations(str(file2), ['zr', 'o'], cache=True, cache_dir=str(cache_dir))
+    assert len(cache_dir.listdir()) == 2
+    recommendations = parse_lorecommendations(str(file1), ['zr', 'o'], cache=True, cache_dir=str(cache_dir))
+    assert isinstance(recommendations.energies, np.memmap)
+    assert recommendations['zr'][0, 0] == -667.0
+    assert len(cache_dir.listdir()) == 2
+
+    # A cache directory that cannot be written to does not stop parsing
+    not_a_directory = tmpdir / "not_a_directory"
+    not_a_directory.write('')
+    recommendations = parse_lorecommendations(str(file2), ['zr', 'o'], cache=True, cache_dir=str(not_a_directory))
+    assert not isinstance(recommendations.energies, np.memmap)
+    assert np.array_equal(recommendations.energies, reference.energies)
+
+
+def test_lazy_lorecommendations(tmpdir):
+    file1 = tmpdir / "lorecommendations.txt"
+    file1.write(lo_recommendations)
+    reference = parse_lorecommendations(str(file1), ['zr', 'o'])
+
+    recommendations = LazyLORecommendations(str(file1), ['zr', 'o'])
+    assert list(recommendations) == ['zr', 'o']
+    assert recommendations.loaded == [], "Nothing parsed on construction"
+
+    assert np.array_equal(recommendations['o'], reference['o'])
+    assert recommendations.loaded == ['o'], "Only the requested species is parsed"
+
+    assert np.array_equal(recommendations['zr'], reference['zr'])
+    assert recommendations.loaded == ['zr', 'o']
+
+    with pytest.raises(ValueError):
+        LazyLORecommendations(str(file1), ['zr', 'o', 'ti'])
+
+
+def test_lorecommendations_array_from_malformed_string():
+    # Remove the last node line of the file
+    truncated = lo_recommendations.replace(" n=          20   1115.85029887173     \n", "")
+    with pytest.raises(ValueError):
+        lorecommendations_array_from_string(truncated)
+
+    # Move the last node line of the first l-channel to the end of the file, such that
+    # the total number of node lines is unchanged
+    node_line = " n=          20   471.219353640417     \n"
+    moved = lo_recommendations.replace(node_line, "", 1) + node_line
+    with pytest.raises(ValueError, match='node lines'):
+        lorecommendations_array_from_string(moved)
+
+
 lo_recommendations = """Energy parameters
  ------------
  species           1
@@ -0,0 +1,200 @@
+""" Test the species database
+"""
+import os
+
+import pytest
+
+from exgw.src.parse import species_database
+from exgw.src.parse.species_database import SpeciesDatabase
+
+
+def test_species_database(tmpdir):
+    (tmpdir / "Zn.xml").write(species_str)
+    (tmpdir / "Cd.xml").write(species_str.replace('chemicalSymbol="Zn"', 'chemicalSymbol="Cd"')
+                                         .replace('z="-30.0000"', 'z="-48.0000"'))
+
+    database = SpeciesDatabase(str(tmpdir))
+    assert len(database) == 2
+    assert 'Zn' in database and 'Cd' in database
+    assert os.path.isfile(database.index_file)
+
+    zn = database.by_symbol('Zn')
+    assert zn['z'] == -30.0
+    assert zn['muffin_tin'] == {'rmin': 1e-06, 'radius': 2.0, 'rinf': 21.8982, 'radialmeshPoints': 600.0}
+    assert zn['l_max'] == 5
+    assert zn['n_los'] == [4, 2, 2, 2, 2, 2]
+
+    assert database.by_z(48)['chemicalSymbol'] == 'Cd'
+    with pytest.raises(KeyError):
+        database.by_z(1)
+
+    assert database.load('Zn')['species']['chemicalSymbol'] == 'Zn'
+
+
+def test_species_database_invalidation(tmpdir):
+    lo = '<lo l="3"><wf matchingOrder="0" trialEnergy="1.0" searchE="false"/></lo>\n'
+    species_with_los = species_str.replace('<custom l="3"', lo * 5 + '<custom l="3"')
+
+    zn_file = tmpdir / "Zn.xml"
+    zn_file.write(species_str)
+
+    database = SpeciesDatabase(str(tmpdir))
+    assert database.with_more_los_than(2, l=3) == []
+
+    # Reloading from the persisted index does not re-parse
+    database = SpeciesDatabase(str(tmpdir))
+    assert database.update() == []
+
+    # Modified files are re-parsed
+    zn_file.write(species_with_los)
+    assert database.update() == ['Zn.xml']
+    assert database.by_symbol('Zn')['n_los'][3] == 7
+    assert database.with_more_los_than(2, l=3) == ['Zn']
+
+    # Invalid files are reported, not indexed
+    (tmpdir / "Bad.xml").write('<spdb></sp>')
+    database.update()
+    assert list(database.errors) == [str(tmpdir / "Bad.xml")]
+    assert len(database) == 1
+
+
+def test_species_database_minimal_and_non_species_files(tmpdir):
+    basis_start = species_str.index('<basis>') + len('<basis>')
+    basis_end = species_str.index('</basis>')
+    no_los_str = (species_str[:basis_start] + '<default type="lapw" trialEnergy="0.1500" searchE="true"/>'
+                  + species_str[basis_end:]).replace('chemicalSymbol="Zn"', 'chemicalSymbol="Cd"')
+    (tmpdir / "Zn.xml").write(species_str)
+    (tmpdir / "Cd.xml").write(no_los_str)
+    (tmpdir / "input.xml").write('<input><structure/></input>')
+
+    database = SpeciesDatabase(str(tmpdir))
+    assert set(database.select(lambda entry: True)) == {'Cd', 'Zn'}
+    assert database.by_symbol('Cd')['l_max'] == 0
+    assert database.by_symbol('Cd')['n_los'] == [0]
+    assert list(database.errors) == [str(tmpdir / "input.xml")]
+
+
+def test_species_database_duplicates_and_failures(tmpdir, monkeypatch):
+    (tmpdir / "Zn.xml").write(species_str)
+    (tmpdir / "Zn_other.xml").write(species_str.replace('name="zinc"', 'name="zinc, other"'))
+    (tmpdir / "Bad.xml").write('<spdb></sp>')
+
+    calls = []
+    parse = species_database.parse_species_xml
+    monkeypatch.setattr(species_database, 'parse_species_xml',
+                        lambda file_name, backend: calls.append(file_name) or parse(file_name, backend))
+
+    # Duplicate chemical symbols are reported, and only the first file is indexed
+    database = SpeciesDatabase(str(tmpdir))
+    assert len(database) == 1
+    assert database.file_name('Zn') == str(tmpdir / "Zn.xml")
+    assert sorted(database.errors) == [str(tmpdir / "Bad.xml"), str(tmpdir / "Zn_other.xml")]
+    assert 'more than one species file' in str(database.errors[str(tmpdir / "Zn_other.xml")])
+    assert len(calls) == 3
+
+    # Unchanged files, including those that failed, are not re-parsed
+    assert database.update() == []
+    assert len(calls) == 3
+    assert sorted(database.errors) == [str(tmpdir / "Bad.xml"), str(tmpdir / "Zn_other.xml")]
+
+    # Without the first definition, the duplicate is indexed
+    os.remove(str(tmpdir / "Zn.xml"))
+    assert database.update() == []
+    assert database.by_symbol('Zn')['name'] == 'zinc, other'
+    assert list(database.errors) == [str(tmpdir / "Bad.xml")]
+
+    # Fixed files are re-parsed
+    (tmpdir / "Bad.xml").write(species_str.replace('chemicalSymbol="Zn"', 'chemicalSymbol="Cd"') + ' ')
+    assert database.update() == ['Bad.xml']
+    assert 'Cd' in database and not database.errors
+
+
+species_str = """<?xml version="1.0" encoding="utf-8"?>
+<spdb xsi:noNamespaceSchemaLocation="../../xml/species.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <sp chemicalSymbol="Zn" name="zinc" z="-30.0000" mass="119198.6780">
+    <muffinTin rmin="0.100000E-05" radius="2.0000" rinf="21.8982" radialmeshPoints="600"/>
+    <atomicState n="1" l="0" kappa="1" occ="2.00000" core="true"/>
+    <atomicState n="2" l="0" kappa="1" occ="2.00000" core="true"/>
+    <atomicState n="2" l="1" kappa="1" occ="2.00000" core="true"/>
+    <atomicState n="2" l="1" kappa="2" occ="4.00000" core="true"/>
+    <atomicState n="3" l="0" kappa="1" occ="2.00000" core="false"/>
+    <atomicState n="3" l="1" kappa="1" occ="2.00000" core="false"/>
+    <atomicState n="3" l="1" kappa="2" occ="4.00000" core="false"/>
+    <atomicState n="3" l="2" kappa="2" occ="4.00000" core="false"/>
+    <atomicState n="3" l="2" kappa="3" occ="6.00000" core="false"/>
+    <atomicState n="4" l="0" kappa="1" occ="2.00000" core="false"/>
+    <basis>
+      <default type="lapw" trialEnergy="0.1500" searchE="true"/>
+
+      <custom l="0" type="lapw" trialEnergy="1.35670550183736" searchE="false"/>
+      <lo l="0">
+        <wf matchingOrder="0" trialEnergy="-4.37848525995355" searchE="false"/>
+	<wf matchingOrder="1" trialEnergy="-4.37848525995355" searchE="false"/>
+      </lo>
+      <lo l="0">
+        <wf matchingOrder="0" trialEnergy="1.35670550183736" searchE="false"/>
+        <wf matchingOrder="1" trialEnergy="1.35670550183736" searchE="false"/>
+      </lo>
+      <lo l="0">
+        <wf matchingOrder="0" trialEnergy="1.35670550183736" searchE="false"/>
+	<wf matchingOrder="0" trialEnergy="-4.37848525995355" searchE="false"/>
+      </lo>
+      <lo l="0">
+        <wf matchingOrder="1" trialEnergy="1.35670550183736" searchE="false"/>
+        <wf matchingOrder="2" trialEnergy="1.35670550183736" searchE="false"/>
+      </lo>
+
+      <custom l="1" type="lapw" trialEnergy="-2.69952312512447" searchE="false"/>
+      <lo l="1">
+        <wf matchingOrder="0" trialEnergy="-2.69952312512447" searchE="false"/>
+        <wf matchingOrder="1" trialEnergy="-2.69952312512447" searchE="false"/>
+      </lo>
+      <lo l="1">
+	<wf matchingOrder="1" trialEnergy="-2.69952312512447" searchE="false"/>
+	<wf matchingOrder="2" trialEnergy="-2.69952312512447" searchE="false"/>
+      </lo>
+
+      <custom l="2" type="lapw" trialEnergy="0.00" searchE="false"/>
+      <lo l="2">
+	<wf matchingOrder="0" trialEnergy="0.00" searchE="false"/>
+        <wf matchingOrder="1" trialEnergy="0.00" searchE="false"/>
+      </lo>
+      <lo l="2">
+	<wf matchingOrder="1" trialEnergy="0.00" searchE="false"/>
+        <wf matchingOrder="2" trialEnergy="0.00" searchE="false"/>
+      </lo>
+
+      <custom l="3" type="lapw" trialEnergy="1.000" searchE="false"/>
+      <lo l="3">
+	<wf matchingOrder="0" trialEnergy="1.000" searchE="false"/>
+	<wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+      </lo>
+      <lo l="3">
+        <wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+        <wf matchingOrder="2" trialEnergy="1.000" searchE="false"/>
+      </lo>
+
+      <custom l="4" type="lapw" trialEnergy="1.000" searchE="false"/>
+      <lo l="4">
+	<wf matchingOrder="0" trialEnergy="1.000" searchE="false"/>
+	<wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+      </lo>
+      <lo l="4">
+        <wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+        <wf matchingOrder="2" trialEnergy="1.000" searchE="false"/>
+      </lo>
+
+      <custom l="5" type="lapw" trialEnergy="1.000" searchE="false"/>
+      <lo l="5">
+	<wf matchingOrder="0" trialEnergy="1.000" searchE="false"/>
+	<wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+      </lo>
+      <lo l="5">
+        <wf matchingOrder="1" trialEnergy="1.000" searchE="false"/>
+        <wf matchingOrder="2" trialEnergy="1.000" searchE="false"/>
+      </lo>
+
+    </basis>
+  </sp>
+</spdb>
+"""
@@ -1,4 +1,9 @@
-from exgw.src.parse.parsers import parse_species_xml
+import gzip
+
+import pytest
+
+from exgw.src.parse import parsers
+from exgw.src.parse.parsers import parse_species_xml, parse_species_files
 
 
 def test_parse_species_xml():
@@ -69,6 +74,64 @@ def test_parse_species_xml():
     assert basis['lo'] == los
 
 
+def test_parse_species_xml_expat_backend(tmpdir):
+    """ Test the streaming backend gives the same result as the ElementTree backend.
+    """
+    reference = parse_species_xml(species_str)
+    assert parse_species_xml(species_str, backend='expat') == reference
+    assert parse_species_xml(species_str.encode(), backend='expat') == reference
+
+    species_file = tmpdir / "Zn.xml"
+    species_file.write(species_str)
+    assert parse_species_xml(str(species_file), backend='expat') == reference
+
+    with pytest.raises(ValueError):
+        parse_species_xml(species_str, backend='sax')
+
+    with pytest.raises(ValueError):
+        parse_species_xml('<spdb></sp>', backend='expat')
+
+    # Well-formed XML that is not a species file fails, as for the etree backend
+    with pytest.raises(ValueError, match='not a species file'):
+        parse_species_xml('<input><structure/></input>', backend='expat')
+
+    with pytest.raises(ValueError, match='outside of an <lo>'):
+        parse_species_xml(species_str.replace('<lo l="0">', '<custom l="0">', 1).replace('</lo>', '</custom>', 1),
+                          backend='expat')
+
+
+@pytest.mark.parametrize('n_workers, executor', [(1, 'process'), (2, 'thread'), (2, 'process')])
+def test_parse_species_files(tmpdir, monkeypatch, n_workers, executor):
+    """ Test parsing of a directory of species files, with one invalid file.
+    """
+    (tmpdir / "Zn.xml").write(species_str)
+    (tmpdir / "Cd.xml").write(species_str.replace('chemicalSymbol="Zn"', 'chemicalSymbol="Cd"'))
+    (tmpdir / "Bad.xml").write('<spdb></sp>')
+    (tmpdir / "input.xml").write('<input><structure/></input>')
+    (tmpdir / "notes.txt").write('Not a species file')
+    with gzip.open(str(tmpdir / "Hg.xml.gz"), 'wt') as fid:
+        fid.write(species_str.replace('chemicalSymbol="Zn"', 'chemicalSymbol="Hg"'))
+
+    species, errors = parse_species_files(str(tmpdir), n_workers=n_workers, executor=executor)
+
+    assert set(species) == {'Cd', 'Hg', 'Zn'}
+    assert species['Zn'] == parse_species_xml(species_str)
+    assert sorted(errors) == [str(tmpdir / "Bad.xml"), str(tmpdir / "input.xml")]
+    assert all(isinstance(error, ValueError) for error in errors.values())
+
+    # Backend returning an empty species section, rather than raising
+    monkeypatch.setitem(parsers._species_backends, 'expat', lambda source: {})
+    species, errors = parse_species_files(str(tmpdir / "Zn.xml"), n_workers=1)
+    assert not species
+    assert 'no species section' in str(errors[str(tmpdir / "Zn.xml")])
+    monkeypatch.undo()
+
+    # Glob pattern
+    species, errors = parse_species_files(str(tmpdir / "Z*.xml"), n_workers=n_workers, executor=executor)
+    assert set(species) == {'Zn'}
+    assert not errors
+
+
 species_str = """<?xml version="1.0" encoding="utf-8"?>
 <spdb xsi:noNamespaceSchemaLocation="../../xml/species.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
   <sp chemicalSymbol="Zn" name="zinc" z="-30.0000" mass="119198.6780">
@@ -0,0 +1,17 @@
+""" Test utilities
+"""
+from exgw.src.utils.utils import compile_converter, str_to_bool, string_to_value
+
+
+def test_compile_converter():
+    attributes = {'n': '3', 'l': '2', 'kappa': '3', 'occ': '6.00000', 'core': 'false', 'label': '3d'}
+
+    convert = compile_converter({'n': int, 'l': int, 'kappa': int, 'occ': float, 'core': str_to_bool})
+    converted = convert(attributes)
+
+    assert converted == {'n': 3, 'l': 2, 'kappa': 3, 'occ': 6.0, 'core': False, 'label': '3d'}
+    assert converted == string_to_value(attributes), "Same result as string_to_value"
+    assert isinstance(converted['occ'], float)
+
+    convert_to_str = compile_converter({'n': int}, default=str)
+    assert convert_to_str({'n': '3', 'occ': '6.00000'}) == {'n': 3, 'occ': '6.00000'}
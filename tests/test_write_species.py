@@ -1,8 +1,14 @@
 """ Test writing serialised species data to XML
 """
+import io
+
+import numpy as np
+
+from exgw.src.basis.optimised_basis import serialised_local_orbitals
 from exgw.src.parse.parsers import parse_species_xml
 
-from exgw.src.write.species import species_xml_str_from_dict
+from exgw.src.write.species import species_xml_str_from_dict, write_species_xml, write_species_file_from_dict, \
+    high_energy_los_string, local_orbital_string
 
 
 def test_write_species_file_from_dict():
@@ -15,6 +21,53 @@ def test_write_species_file_from_dict():
     print(species_string)
 
 
+def test_write_species_xml(tmpdir):
+    species_dict = parse_species_xml(species_str)
+    expected = species_xml_str_from_dict(species_dict)
+
+    class CountingStream(io.StringIO):
+        n_writes = 0
+
+        def write(self, s):
+            self.n_writes += 1
+            return super().write(s)
+
+    stream = CountingStream()
+    write_species_xml(species_dict, stream)
+    assert stream.getvalue() == expected
+    assert stream.n_writes == 1, "Species files smaller than the buffer are written in one chunk"
+
+    stream = CountingStream()
+    write_species_xml(species_dict, stream, buffer_size=256)
+    assert stream.getvalue() == expected
+    assert 1 < stream.n_writes <= len(expected) // 256 + 1
+
+    file_name = str(tmpdir / "Zn.xml")
+    write_species_file_from_dict(species_dict, file_name)
+    with open(file_name) as fid:
+        assert fid.read() == expected
+    assert parse_species_xml(file_name) == species_dict
+
+
+def test_high_energy_los_string():
+    energies = np.array([3.6155, 12.5, 101.123456789])
+    string = high_energy_los_string(3, energies, precision=4)
+    assert string == ''.join(local_orbital_string(lo) for lo in serialised_local_orbitals(3, [3.6155, 12.5, 101.1235]))\
+        .replace('"12.5"', '"12.5000"')
+    assert high_energy_los_string(3, np.array([])) == ''
+
+    # Written with the species file, and readable by the parser
+    species_dict = parse_species_xml(species_str)
+    stream = io.StringIO()
+    write_species_xml(species_dict, stream, lo_energies={1: energies})
+    written = parse_species_xml(stream.getvalue())
+
+    added_los = serialised_local_orbitals(1, np.round(energies, 8).tolist())
+    los = species_dict['basis']['lo']
+    n_los_l_le_1 = sum(lo['l'] <= 1 for lo in los)
+    assert written['basis']['lo'] == los[:n_los_l_le_1] + added_los + los[n_los_l_le_1:]
+
+
 species_str = """<?xml version="1.0" encoding="utf-8"?>
 <spdb xsi:noNamespaceSchemaLocation="../../xml/species.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
   <sp chemicalSymbol="Zn" name="zinc" z="-30.0000" mass="119198.6780">
@@ -0,0 +1,73 @@
+""" Test XML input sources
+"""
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from exgw.src.parse import xml_source
+from exgw.src.parse.xml_source import is_xml_text, xml_root
+
+
+xml_str = """<?xml version="1.0" encoding="utf-8"?>
+<spdb>
+  <sp chemicalSymbol="Zn" name="zinc" z="-30.0000" mass="119198.6780"/>
+</spdb>
+"""
+
+
+def test_is_xml_text():
+    assert is_xml_text(xml_str)
+    assert is_xml_text('\n   <spdb/>')
+    assert not is_xml_text('species/Zn.xml')
+
+
+def test_xml_root_input_types(tmpdir):
+    xml_file = tmpdir / "Zn.xml"
+    xml_file.write(xml_str)
+
+    element = ET.fromstring(xml_str)
+    assert xml_root(element) is element
+
+    inputs = [xml_str, xml_str.encode(), str(xml_file), Path(str(xml_file)), io.StringIO(xml_str),
+              io.BytesIO(xml_str.encode())]
+    for input in inputs:
+        root = xml_root(input)
+        assert root.tag == 'spdb'
+        assert root[0].attrib['chemicalSymbol'] == 'Zn'
+
+
+@pytest.mark.parametrize('extension, opener', [('.gz', gzip.open), ('.bz2', bz2.open), ('.xz', lzma.open)])
+def test_xml_root_compressed_files(tmpdir, extension, opener):
+    file_name = str(tmpdir / ("Zn.xml" + extension))
+    with opener(file_name, 'wt') as fid:
+        fid.write(xml_str)
+
+    assert xml_root(file_name)[0].attrib['chemicalSymbol'] == 'Zn'
+
+
+def test_xml_source_memory_maps_large_files(tmpdir, monkeypatch):
+    xml_file = tmpdir / "Zn.xml"
+    xml_file.write(xml_str)
+    monkeypatch.setattr(xml_source, 'mmap_threshold', 1)
+
+    with xml_source.xml_source(str(xml_file)) as data:
+        assert isinstance(data, mmap.mmap)
+
+    assert xml_root(str(xml_file))[0].attrib['chemicalSymbol'] == 'Zn'
+
+
+def test_xml_root_invalid_input(tmpdir):
+    with pytest.raises(ValueError):
+        xml_root(str(tmpdir / "missing.xml"))
+
+    with pytest.raises(ValueError):
+        xml_root('<spdb></sp>')
+
+    with pytest.raises(TypeError):
+        xml_root(1)